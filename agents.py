@@ -3,11 +3,18 @@ import os
 import sqlite3
 import json
 import asyncio
-from typing import TypedDict, Annotated, List, Dict, Any
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from typing import TypedDict, Annotated, List, Dict, Any, Optional
 from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
 from google import genai
 from google.genai import types
-from datetime import datetime
 
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY")
@@ -20,20 +27,87 @@ CLIENT = genai.Client(api_key=API_KEY) if API_KEY else None
 DB_FILE = "user_data.db"
 CONVERSATION_DIR = "conversations"
 
+# --- Pooled SQLite connection ---
+
+_SQL_INTERESTS = "SELECT interests FROM user_interests WHERE user_name = ?"
+_SQL_EVENTS = (
+    "SELECT interest_tag, event_name, date, location FROM social_events "
+    "WHERE interest_tag IN ({placeholders}) AND date > date('now', 'localtime')"
+)
+
+_LOCAL = threading.local()
+_POOLED_CONNECTIONS: List[sqlite3.Connection] = []
+_POOL_LOCK = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Returns this thread's pooled connection, opening it on first use."""
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _LOCAL.conn = conn
+        with _POOL_LOCK:
+            _POOLED_CONNECTIONS.append(conn)
+    return conn
+
+
+@atexit.register
+def _close_pooled_connections():
+    """Closes every pooled connection on interpreter shutdown."""
+    with _POOL_LOCK:
+        for conn in _POOLED_CONNECTIONS:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _POOLED_CONNECTIONS.clear()
+
+
+# --- Interests cache ---
+
+INTERESTS_CACHE_TTL = 300  # seconds
+INTERESTS_CACHE_MAXSIZE = 1024
+
+_INTERESTS_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_INTERESTS_CACHE_LOCK = threading.Lock()
+
+
+def get_cached_user_interests(user_name: str) -> Optional[str]:
+    """Returns the cached interests for a user, or None on a miss or expiry."""
+    with _INTERESTS_CACHE_LOCK:
+        cached = _INTERESTS_CACHE.get(user_name)
+        if cached and cached[1] > time.monotonic():
+            _INTERESTS_CACHE.move_to_end(user_name)
+            return cached[0]
+    return None
+
 
 # --- Tools for Social Agent ---
 
 def get_user_interests(user_name: str) -> str:
     """Gets the user's interests from the database."""
+    cached = get_cached_user_interests(user_name)
+    if cached is not None:
+        return cached
+
+    now = time.monotonic()
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("SELECT interests FROM user_interests WHERE user_name = ?", (user_name,))
-        result = cursor.fetchone()
-        conn.close()
+        result = _get_conn().execute(_SQL_INTERESTS, (user_name,)).fetchone()
         if result:
-            return result[0]
-        return f"No specific interests found for {user_name}. Using default interests: wellness, outdoor activities, social events."
+            interests = result[0]
+        else:
+            interests = f"No specific interests found for {user_name}. Using default interests: wellness, outdoor activities, social events."
+
+        with _INTERESTS_CACHE_LOCK:
+            _INTERESTS_CACHE[user_name] = (interests, now + INTERESTS_CACHE_TTL)
+            _INTERESTS_CACHE.move_to_end(user_name)
+            if len(_INTERESTS_CACHE) > INTERESTS_CACHE_MAXSIZE:
+                _INTERESTS_CACHE.popitem(last=False)
+
+        return interests
     except Exception as e:
         print(f"Error getting user interests: {e}")
         return "wellness, outdoor activities, social events"
@@ -42,26 +116,23 @@ def get_user_interests(user_name: str) -> str:
 def find_social_events(interests: str) -> List[dict]:
     """Finds social events based on a list of user interests."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        interest_list = [i.strip().lower() for i in interests.split(',')]
-
-        found_events = []
-        for interest in interest_list:
-            cursor.execute(
-                "SELECT event_name, date, location FROM social_events WHERE interest_tag = ? AND date > ?",
-                (interest, datetime.now().strftime('%Y-%m-%d'))
-            )
-            for event in cursor.fetchall():
-                found_events.append({
-                    "interest": interest,
-                    "name": event[0],
-                    "date": event[1],
-                    "location": event[2],
-                })
-
-        conn.close()
+        interest_list = list(dict.fromkeys(i.strip().lower() for i in interests.split(',')))
+
+        # One query for all interests instead of one round-trip per interest
+        sql = _SQL_EVENTS.format(placeholders=",".join("?" * len(interest_list)))
+        rows = _get_conn().execute(sql, interest_list).fetchall()
+
+        # Keep results grouped in the order the interests were given
+        order = {interest: idx for idx, interest in enumerate(interest_list)}
+        found_events = [
+            {
+                "interest": event[0],
+                "name": event[1],
+                "date": event[2],
+                "location": event[3],
+            }
+            for event in sorted(rows, key=lambda row: order[row[0]])
+        ]
 
         # If no events found, return some default suggestions
         if not found_events:
@@ -83,6 +154,55 @@ def find_social_events(interests: str) -> List[dict]:
         }]
 
 
+# --- Background conversation writer ---
+
+_SQL_SAVE_CONVERSATION = "INSERT INTO conversations (user_name, conversation_text) VALUES (?, ?)"
+SAVE_BATCH_SIZE = 32
+
+_SAVE_QUEUE: Optional[asyncio.Queue] = None
+_SAVE_TASK: Optional[asyncio.Task] = None
+
+
+def _save_conversations(rows: List[tuple]):
+    """Writes a batch of (user_name, conversation_text) rows in one transaction."""
+    conn = _get_conn()
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(_SQL_SAVE_CONVERSATION, rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+async def _conversation_writer(queue: asyncio.Queue):
+    """Drains the save queue, writing whatever has accumulated as one batch."""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < SAVE_BATCH_SIZE:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        try:
+            await asyncio.to_thread(_save_conversations, batch)
+        except Exception as e:
+            print(f"WARNING: Could not save conversation: {e}")
+
+
+def enqueue_conversation(user_name: str, conversation_text: str):
+    """Queues a conversation for saving without waiting on the disk write."""
+    global _SAVE_QUEUE, _SAVE_TASK
+
+    loop = asyncio.get_running_loop()
+    if _SAVE_TASK is None or _SAVE_TASK.done() or _SAVE_TASK.get_loop() is not loop:
+        _SAVE_QUEUE = asyncio.Queue()
+        _SAVE_TASK = loop.create_task(_conversation_writer(_SAVE_QUEUE))
+
+    _SAVE_QUEUE.put_nowait((user_name, conversation_text))
+
+
 # --- State for LangGraph ---
 
 class AgentState(TypedDict):
@@ -103,9 +223,14 @@ class AgentState(TypedDict):
 class BaseAgent:
     """Base class for all specialized agents."""
 
+    # Optional JSON schema; when set, the model is asked for structured JSON output
+    response_schema: Optional[dict] = None
+
     def __init__(self, system_prompt: str):
         self.system_prompt = system_prompt
         self.model = 'gemini-2.0-flash-exp'
+        # Static prefix of every Gemini request; only the context is appended per call
+        self._system_part_text = f"{system_prompt}\n\n[CONTEXT]: "
 
     def _format_messages(self, state: AgentState) -> List[AnyMessage]:
         """Prepares messages for the model (as LangChain messages for state history)."""
@@ -120,7 +245,7 @@ class BaseAgent:
         """Creates the native Gemini Content object for the API call."""
         initial_context_str = f"User Name: {state['user_name']}. Initial Mood: {state['initial_mood']}. Initial Health: {state['initial_health_data']}."
 
-        full_message = f"{self.system_prompt}\n\n[CONTEXT]: {initial_context_str}"
+        full_message = self._system_part_text + initial_context_str
 
         return [
             types.Content(
@@ -143,17 +268,25 @@ class BaseAgent:
         messages_gemini = self._create_gemini_content(state)
 
         try:
-            # Run synchronous API call in thread pool
-            response = await asyncio.to_thread(
-                CLIENT.models.generate_content_stream,
+            # Native async streaming keeps the event loop free for the other agents
+            config = None
+            if self.response_schema is not None:
+                config = types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=self.response_schema,
+                )
+
+            response = await CLIENT.aio.models.generate_content_stream(
                 model=self.model,
-                contents=messages_gemini
+                contents=messages_gemini,
+                config=config
             )
 
-            full_response = ""
-            for chunk in response:
+            response_parts = []
+            async for chunk in response:
                 if chunk.text:
-                    full_response += chunk.text
+                    response_parts.append(chunk.text)
+            full_response = "".join(response_parts)
 
             return {
                 "messages": messages_lc + [SystemMessage(content=f"Agent response: {full_response}")]
@@ -168,13 +301,21 @@ class BaseAgent:
 # --- Agent 1: Sentiment Agent ---
 
 class SentimentAgent(BaseAgent):
+    response_schema = {
+        "type": "object",
+        "properties": {
+            "mood_score": {"type": "integer"},
+            "mood_analysis": {"type": "string"},
+        },
+        "required": ["mood_score", "mood_analysis"],
+    }
+
     def __init__(self):
         system_prompt = (
             "You are a specialized **Mood/Sentiment Analysis Agent**. "
             "Your task is to analyze the provided initial context (user name, mood, health data) "
-            "and produce a mood score and a short analysis. "
-            "Output *only* a JSON object with the following schema: "
-            "{'mood_score': int (1-10, 1=very low, 10=very high), 'mood_analysis': str (a short, one-sentence justification)}."
+            "and produce a mood score (1-10, 1=very low, 10=very high) "
+            "and a short, one-sentence mood analysis justifying it."
         )
         super().__init__(system_prompt)
 
@@ -184,8 +325,7 @@ class SentimentAgent(BaseAgent):
         full_response = result['messages'][-1].content.replace("Agent response: ", "")
 
         try:
-            json_str = full_response.strip().replace("```json", "").replace("```", "")
-            data = json.loads(json_str)
+            data = orjson.loads(full_response) if orjson else json.loads(full_response)
 
             return {
                 "mood_score": data.get("mood_score", 5),
@@ -212,7 +352,11 @@ class SentimentAgent(BaseAgent):
 class SocialAgent(BaseAgent):
     def __init__(self):
         self.tool_functions = [get_user_interests, find_social_events]
-        self.tool_map = {tool.__name__: tool for tool in self.tool_functions}
+        # Explicit dispatch so call.args can be passed through without copying
+        self.tool_dispatch = {
+            "get_user_interests": lambda args: get_user_interests(args["user_name"]),
+            "find_social_events": lambda args: find_social_events(args["interests"]),
+        }
 
         system_prompt = (
             "You are a specialized **Social Event Agent**. "
@@ -224,6 +368,23 @@ class SocialAgent(BaseAgent):
         )
         super().__init__(system_prompt)
 
+    async def _run_tool(self, call):
+        """Executes a single function call requested by the model."""
+        dispatch = self.tool_dispatch.get(call.name)
+
+        if not dispatch:
+            raise ValueError(f"Unknown tool: {call.name}")
+
+        args = call.args or {}
+
+        # Cached interests need no thread hop
+        if call.name == "get_user_interests":
+            cached = get_cached_user_interests(args["user_name"])
+            if cached is not None:
+                return cached
+
+        return await asyncio.to_thread(dispatch, args)
+
     async def __call__(self, state: AgentState):
         messages_lc = self._format_messages(state)
 
@@ -242,8 +403,7 @@ class SocialAgent(BaseAgent):
             while iteration < max_iterations:
                 iteration += 1
 
-                response = await asyncio.to_thread(
-                    CLIENT.models.generate_content,
+                response = await CLIENT.aio.models.generate_content(
                     model=self.model,
                     contents=messages_gemini,
                     config=types.GenerateContentConfig(tools=self.tool_functions)
@@ -256,26 +416,22 @@ class SocialAgent(BaseAgent):
                     function_calls = [p for p in parts if hasattr(p, 'function_call') and p.function_call]
 
                     if function_calls:
-                        tool_output_parts = []
-
-                        for part in function_calls:
-                            call = part.function_call
-                            tool_func = self.tool_map.get(call.name)
-
-                            if not tool_func:
-                                raise ValueError(f"Unknown tool: {call.name}")
-
-                            # Execute the tool
-                            tool_result = await asyncio.to_thread(tool_func, **dict(call.args))
-
-                            tool_output_parts.append(
-                                types.Part(
-                                    function_response=types.FunctionResponse(
-                                        name=call.name,
-                                        response={"result": tool_result}
-                                    )
+                        calls = [part.function_call for part in function_calls]
+
+                        # Independent tool calls run concurrently
+                        tool_results = await asyncio.gather(
+                            *(self._run_tool(call) for call in calls)
+                        )
+
+                        tool_output_parts = [
+                            types.Part(
+                                function_response=types.FunctionResponse(
+                                    name=call.name,
+                                    response={"result": tool_result}
                                 )
                             )
+                            for call, tool_result in zip(calls, tool_results)
+                        ]
 
                         # Append model's call and tool results
                         messages_gemini.append(types.Content(role="model", parts=parts))
@@ -313,13 +469,11 @@ class SocialAgent(BaseAgent):
 
 class HealthAgent(BaseAgent):
     def __init__(self):
+        # Recorded in the message history only; the score is computed locally
         system_prompt = (
             "You are a specialized **Health and Fitness Agent**. "
-            "Analyze the provided `initial_health_data` (steps, sleep). "
-            "Calculate a **Health Score** (1-100, where 100 is excellent). "
-            "Provide a one-sentence health suggestion based on the data. "
-            "Output *only* a JSON object with the following schema: "
-            "{'health_score': int, 'health_suggestion': str}."
+            "Score the provided `initial_health_data` (steps, sleep) as a "
+            "**Health Score** (1-100, where 100 is excellent) with a one-sentence suggestion."
         )
         super().__init__(system_prompt)
 
@@ -342,35 +496,27 @@ class HealthAgent(BaseAgent):
         else:
             suggestion = "Your health metrics look good! Keep up the great work."
 
-        result = await super().__call__(state)
-
+        # Score and suggestion are deterministic, so no model round-trip is needed
         return {
             "health_score": score,
             "health_suggestion": suggestion,
-            "messages": result["messages"] + [
+            "messages": self._format_messages(state) + [
                 SystemMessage(content=f"Health Agent Analysis: Score={score}, Suggestion='{suggestion}'")
             ]
         }
 
 
-# --- Final Prompt Generator ---
+# --- Shared agent instances ---
+# Agents hold no per-request state, so one instance of each is reused everywhere.
 
-async def generate_final_prompt(state: AgentState) -> dict:
-    """
-    Combines the outputs of all specialized agents into a single, cohesive prompt
-    for the conversational Wellness Agent.
-    """
-    user_name = state['user_name']
-    initial_mood = state['initial_mood']
-    steps = state['initial_health_data'].get('steps_today', 'N/A')
-    sleep = state['initial_health_data'].get('sleep_hours_last_night', 'N/A')
+SENTIMENT_AGENT = SentimentAgent()
+SOCIAL_AGENT = SocialAgent()
+HEALTH_AGENT = HealthAgent()
 
-    mood_analysis = state.get('mood_analysis', 'No mood analysis available.')
-    social_suggestion = state.get('social_suggestion', 'No social suggestions available.')
-    health_suggestion = state.get('health_suggestion', 'No health suggestions available.')
-    health_score = state.get('health_score', 'N/A')
 
-    prompt = f"""
+# --- Final Prompt Generator ---
+
+_FINAL_TEMPLATE = """
 *** FINAL CONTEXT FOR WELLNESS AGENT ***
 
 The user is {user_name}.
@@ -395,14 +541,35 @@ Agent-Generated Analysis:
 Start your final response with the actual conversational text the Wellness Agent should say to the user.
 """
 
-    # Save conversation if database is available
-    try:
-        from setup_database import save_conversation
-        await asyncio.to_thread(save_conversation, user_name, prompt)
-    except ImportError:
-        print("WARNING: Could not import save_conversation. Skipping database save.")
-    except Exception as e:
-        print(f"WARNING: Could not save conversation: {e}")
+
+async def generate_final_prompt(state: AgentState) -> dict:
+    """
+    Combines the outputs of all specialized agents into a single, cohesive prompt
+    for the conversational Wellness Agent.
+    """
+    user_name = state['user_name']
+    initial_mood = state['initial_mood']
+    steps = state['initial_health_data'].get('steps_today', 'N/A')
+    sleep = state['initial_health_data'].get('sleep_hours_last_night', 'N/A')
+
+    mood_analysis = state.get('mood_analysis', 'No mood analysis available.')
+    social_suggestion = state.get('social_suggestion', 'No social suggestions available.')
+    health_suggestion = state.get('health_suggestion', 'No health suggestions available.')
+    health_score = state.get('health_score', 'N/A')
+
+    prompt = _FINAL_TEMPLATE.format_map({
+        "user_name": user_name,
+        "initial_mood": initial_mood,
+        "steps": steps,
+        "sleep": sleep,
+        "mood_analysis": mood_analysis,
+        "health_score": health_score,
+        "health_suggestion": health_suggestion,
+        "social_suggestion": social_suggestion,
+    })
+
+    # Save conversation in the background so the disk write stays off the critical path
+    enqueue_conversation(user_name, prompt)
 
     return {"final_context_prompt": prompt}
 
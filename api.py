@@ -2,26 +2,59 @@
 import os
 import uvicorn
 import asyncio
-from fastapi import FastAPI, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Dict, Set, List
+from typing import Callable, Optional, Dict, List, Set, Tuple, Union
 import json
-from get_data import fetch_ticketmaster_events, TicketmasterError
-from db_client import fetch_social_events_by_name, DatabaseError
+import gzip
+import time
+import secrets
+import atexit
+import logging
+import logging.handlers
+from queue import SimpleQueue
+from collections import OrderedDict
+from operator import attrgetter
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+from get_data import fetch_ticketmaster_events, create_http_client, TicketmasterError
+from db_client import fetch_social_events_by_name_async, DatabaseError
 from datetime import datetime
-from mobile_audio_handler import mobile_session_manager, MobileAudioSession
-import base64
+from dataclasses import dataclass, field
+from mobile_audio_handler import mobile_session_manager, MobileAudioSession, encode_message, CLIENT_AUDIO_OPCODE
+import binascii
 
 # Import the necessary components
-from welness_agent_live import UserContext, HealthSnapshot, WellnessAgentLive
-from wellness_orchestrator_live import run_orchestration_with_callback
+from welness_agent_live import UserContext, WellnessAgentLive
+from wellness_orchestrator_live import run_orchestration_with_callback, app as graph_app
+from agents import AgentState
+
+# Read once at import; the .env file has already been loaded by get_data/db_client
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+# Shared text-chat agent; chat() opens its own live session per call, so one
+# instance (and one Gemini client) can serve every /wellness-chat request
+WELLNESS_CHAT_AGENT = WellnessAgentLive(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
+
+# Logs are formatted and written to stderr on a listener thread, so a burst
+# of failing sessions does not stall the event loop on traceback I/O. Use
+# %-style arguments: records below API_LOG_LEVEL are never formatted.
+log = logging.getLogger("api")
+log.setLevel(os.environ.get("API_LOG_LEVEL", "INFO").upper())
+log.propagate = False
+_log_queue: SimpleQueue = SimpleQueue()
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
-# Global dictionary to track session states
-active_sessions: Dict[str, Dict] = {}
-session_websockets: Dict[str, Set[WebSocket]] = {}
 chat_sessions: Dict[str, List[Dict[str, str]]] = {}
+# Chat session id -> last use (monotonic), oldest first, for the idle sweep
+_chat_last_used: "OrderedDict[str, float]" = OrderedDict()
 
 
 # ---- Pydantic models (HTTP layer) ----
@@ -64,6 +97,7 @@ class SessionEndResponse(BaseModel):
 
 class SocialEventQuery(BaseModel):
     event_name: str
+    substring: bool = False  # match anywhere in the name instead of as a prefix (slower)
 
 
 class ChatUserContextIn(BaseModel):
@@ -109,7 +143,8 @@ Session Management:
 app = FastAPI(
     title="Wellness Agent Orchestration API",
     description="Multi-agent wellness orchestration with WebSocket support",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse if orjson else JSONResponse,
 )
 
 # Add CORS middleware
@@ -139,146 +174,629 @@ def build_user_context_from_request(req: WellnessChatRequest) -> Optional[UserCo
     if not req.context:
         return None
 
-    c = req.context
-
-    # Build HealthSnapshot if present
-    health = None
-    if c.health is not None:
-        health = HealthSnapshot(
-            steps_today=c.health.steps_today,
-            sleep_hours_last_night=c.health.sleep_hours_last_night,
-        )
+    data = req.context.model_dump(exclude_none=True)
 
     # Default name if frontend doesn't send one
-    name = c.name or "Sagar"
+    if not data.get("name"):
+        data["name"] = "Sagar"
+
+    return UserContext.from_dict(data)
+
+# ---- Response caches ----
+
+class TTLCache:
+    """Small LRU cache whose entries expire after `ttl` seconds."""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    def get(self, key: tuple, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: tuple, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_load(self, key: tuple, loader):
+        """
+        Return the cached value, or await `loader()` and cache its result.
+        Concurrent misses for the same key share a single load.
+        """
+        value = self.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return value
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(loader())
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda f: self._loaded(key, f))
+        # Shielded so one caller going away does not cancel the load for the others
+        return await asyncio.shield(pending)
+
+    def _loaded(self, key: tuple, future: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.set(key, future.result())
+
+
+events_near_me_cache = TTLCache(maxsize=1024, ttl=60)
+social_events_cache = TTLCache(maxsize=4096, ttl=30)
+
+
+# ---- Session storage ----
+
+@dataclass(slots=True)
+class SessionState:
+    """Per-session record. Created once per session and mutated in place."""
+    user_name: str
+    status: str
+    ended: bool = False
+    reason: Optional[str] = None
+    started_at: Optional[datetime] = None
+    timestamp: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    error_details: Optional[str] = None
+    health_data: Dict = field(default_factory=dict)
+    # Filled in by the mobile orchestration
+    system_prompt: Optional[str] = None
+    initial_context: str = ""
+    mood_score: Optional[int] = None
+    health_score: Optional[int] = None
+    mood_analysis: Optional[str] = None
+    social_suggestion: Optional[str] = None
+    health_suggestion: Optional[str] = None
+
+
+class SessionStore:
+    """
+    In-process session state. Writes go through create()/update() so that
+    anyone blocked in wait() is woken as soon as a session is marked ended,
+    and on_status_change (if set) hears about every status transition.
+    """
+
+    def __init__(self):
+        # A single dict on purpose: all access happens on the event loop
+        # thread, so sharding would add a hash and an index per lookup
+        # without removing any contention.
+        self.sessions: Dict[str, SessionState] = {}
+        # Only sessions someone is currently waiting on have an event
+        self.events: Dict[str, asyncio.Event] = {}
+        # Number of wait() calls currently blocked on each session's event
+        self._waiters: Dict[str, int] = {}
+        # Monotonic time at which each ended session was first seen as ended
+        self._ended_at: Dict[str, float] = {}
+        self.on_status_change: Optional[Callable[[str, SessionState], None]] = None
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.sessions
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        return self.sessions.get(session_id)
+
+    def create(self, session_id: str, user_name: str, status: str, **fields) -> SessionState:
+        """Start a fresh state for a session, replacing any previous one."""
+        state = self.sessions[session_id] = SessionState(user_name, status, **fields)
+        self._ended_at.pop(session_id, None)
+        self._notify_if_ended(session_id, state)
+        return state
+
+    def update(self, session_id: str, **fields) -> Optional[SessionState]:
+        """
+        Set fields on the stored state for a session and return it. A session
+        that is gone (e.g. already swept) is left alone and None is returned.
+        """
+        state = self.sessions.get(session_id)
+        if state is None:
+            return None
+        previous_status = state.status
+        for name, value in fields.items():
+            setattr(state, name, value)
+        if self.on_status_change is not None and state.status != previous_status:
+            self.on_status_change(session_id, state)
+        self._notify_if_ended(session_id, state)
+        return state
+
+    async def wait(self, session_id: str, timeout: float) -> Optional[SessionState]:
+        """
+        Wait until the session has ended and return its state,
+        or None if the timeout elapses first.
+        """
+        state = self.sessions[session_id]
+        if state.ended:
+            return state
+
+        event = self._event(session_id)
+        self._waiters[session_id] = self._waiters.get(session_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            remaining = self._waiters.pop(session_id) - 1
+            if remaining:
+                self._waiters[session_id] = remaining
+            elif self.events.get(session_id) is event:
+                # Last waiter gave up before the session ended; don't keep the event
+                del self.events[session_id]
+        return state
+
+    def _event(self, session_id: str) -> asyncio.Event:
+        event = self.events.get(session_id)
+        if event is None:
+            event = self.events[session_id] = asyncio.Event()
+        return event
+
+    def sweep(self, ttl: float) -> List[str]:
+        """Drop sessions that ended more than ttl seconds ago and return their ids."""
+        cutoff = time.monotonic() - ttl
+        expired = [sid for sid, ended_at in self._ended_at.items() if ended_at < cutoff]
+        for session_id in expired:
+            self.sessions.pop(session_id, None)
+            del self._ended_at[session_id]
+        return expired
+
+    def _notify_if_ended(self, session_id: str, state: SessionState):
+        if state.ended:
+            self._ended_at.setdefault(session_id, time.monotonic())
+            # Waiters hold their own reference, so the event can be dropped now
+            event = self.events.pop(session_id, None)
+            if event is not None:
+                event.set()
+
+
+# Global store tracking session states
+session_store = SessionStore()
+
+# Ended sessions are kept around this long so late pollers can still read them
+SESSION_TTL_SECONDS = 2 * 60 * 60
+SESSION_SWEEP_INTERVAL_SECONDS = 5 * 60
+
+# Long-poll requests return before typical proxy idle timeouts (60-120 s)
+LONG_POLL_MAX_WAIT_SECONDS = 55
+
+# SessionState fields returned by /session/{session_id}/result, read in one call
+_SESSION_RESULT_FIELDS = (
+    "user_name", "status", "reason", "started_at", "ended_at",
+    "timestamp", "duration_seconds", "error_details",
+)
+_session_result_values = attrgetter(*_SESSION_RESULT_FIELDS)
+
+# permessage-deflate is turned off in uvicorn; only frames above this size are
+# gzipped by the broadcast writer and sent with a one-byte tag in front.
+WS_COMPRESS_THRESHOLD_BYTES = 512
+WS_GZIP_TAG = b"\x01"
+
+# Frames buffered per subscriber before the oldest is dropped
+WS_CLIENT_QUEUE_SIZE = 64
+
+# Bursty progress updates (live analysis, orchestration steps) are coalesced
+# so at most one of each kind goes out per window, carrying the latest state.
+WS_DEBOUNCE_SECONDS = 0.05
+
+# WebSocket keep-alive is done with protocol-level ping/pong frames
+WS_PING_INTERVAL_SECONDS = 20.0
+WS_PING_TIMEOUT_SECONDS = 20.0
+
+
+def register_pending_session(session_id: str, user_name: str):
+    """Record a session that has been accepted but whose workflow has not started yet."""
+    session_store.create(session_id, user_name, "starting", started_at=datetime.now())
 
-    return UserContext(
-        name=name,
-        mood=c.mood,
-        health=health,
-        conversation_summary=c.conversation_summary,
-        goals=c.goals,
-    )
 
 # ---- WebSocket Manager ----
 
+def _json_default(obj):
+    """Fallback encoder for the stdlib path; orjson handles datetimes natively."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_json_default).encode("utf-8")
+
+
+def drop_none(obj: Dict) -> Dict:
+    """Leave out unset (None) fields so responses only carry what is known."""
+    return {k: v for k, v in obj.items() if v is not None}
+
+
+def loads_json(data: Union[str, bytes]):
+    """Parse JSON text or bytes, using orjson when it is installed."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Fixed-shape broadcast payloads: the constant parts are pre-encoded and only
+# the variable fields are serialized per event, then spliced in with %.
+_TPL_SESSION_STARTED = b'{"type":"session_started","user_name":%s,"session_id":%s,"timestamp":%s}'
+_TPL_SESSION_ENDED_DETAILED = (
+    b'{"type":"session_ended","reason":%s,"timestamp":%s,"duration_seconds":%s,"session_data":%s}'
+)
+_TPL_SESSION_ERROR = b'{"type":"session_error","error":%s,"timestamp":%s}'
+
+
+def _debounce_kind(message: dict) -> Optional[str]:
+    """Return the debounce key for bursty progress updates, None for everything else."""
+    kind = message.get("type")
+    if kind == "agent_event":
+        kind = message.get("event")
+    if kind == "live_analysis" or (kind and kind.startswith("orchestration_")):
+        return kind
+    return None
+
+
+@dataclass(slots=True)
+class _Channel:
+    """
+    Broadcast state for a session with at least one subscriber. Kept apart
+    from SessionState, which outlives its subscribers by SESSION_TTL_SECONDS.
+    """
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    # subscriber -> (its bounded outbox, its sender task)
+    subscribers: Dict[WebSocket, Tuple[asyncio.Queue, asyncio.Task]] = field(default_factory=dict)
+    writer: Optional[asyncio.Task] = None
+    last_digest: Optional[int] = None
+    # debounce kind -> latest message, and the task that will flush it
+    pending: Dict[str, dict] = field(default_factory=dict)
+    flushers: Dict[str, asyncio.Task] = field(default_factory=dict)
+
+    def stop(self):
+        """Cancel the writer, any scheduled debounce flushes and every sender."""
+        current = asyncio.current_task()
+        tasks = [self.writer, *self.flushers.values(), *(sender for _, sender in self.subscribers.values())]
+        for task in tasks:
+            if task is not None and task is not current:
+                task.cancel()
+        self.flushers.clear()
+        self.pending.clear()
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
+    """
+    Tracks WebSocket subscribers per session. Broadcasts are encoded once,
+    queued per session and picked up by a single writer task, which packs
+    messages that arrive back-to-back into one newline-delimited JSON frame.
+    Every subscriber then gets the frame through its own bounded queue and
+    sender task, so one slow socket cannot hold up the others. Everything a
+    session needs for this lives in one _Channel, found with a single lookup.
+
+    A dict message identical to the previous one for the session is dropped,
+    and bursty progress updates are debounced (see WS_DEBOUNCE_SECONDS).
+    """
 
-    async def connect(self, session_id: str, websocket: WebSocket):
+    def __init__(self):
+        self.channels: Dict[str, _Channel] = {}
+
+    async def connect(self, session_id: str, websocket: WebSocket,
+                      snapshot: Optional[Callable[[], Dict]] = None):
+        """
+        Accept and subscribe a client. If given, snapshot() is called once the
+        socket is accepted and its message is queued as the client's first
+        frame, so it is always delivered before any later broadcast.
+        """
         await websocket.accept()
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = set()
-        self.active_connections[session_id].add(websocket)
-        print(f"[WS] Client connected to session {session_id}")
-
-    async def disconnect(self, session_id: str, websocket: WebSocket):
-        if session_id in self.active_connections:
-            self.active_connections[session_id].discard(websocket)
-            if not self.active_connections[session_id]:
-                del self.active_connections[session_id]
-        print(f"[WS] Client disconnected from session {session_id}")
-
-    async def broadcast(self, session_id: str, message: dict):
-        if session_id in self.active_connections:
-            disconnected = set()
-            for connection in self.active_connections[session_id]:
+        channel = self.channels.get(session_id)
+        if channel is None:
+            channel = self.channels[session_id] = _Channel()
+            channel.writer = asyncio.create_task(self._writer(channel))
+        outbox = asyncio.Queue(maxsize=WS_CLIENT_QUEUE_SIZE)
+        if snapshot is not None:
+            # No await between here and registration, so no broadcast can slip in first
+            outbox.put_nowait(dumps_json(snapshot()))
+        channel.subscribers[websocket] = (
+            outbox, asyncio.create_task(self._sender(session_id, websocket, outbox))
+        )
+        log.debug("[WS] Client connected to session %s", session_id)
+
+    def disconnect(self, session_id: str, websocket: WebSocket):
+        """Forget a subscriber. Plain def: it only updates bookkeeping and cancels tasks."""
+        channel = self.channels.get(session_id)
+        if channel is not None:
+            subscriber = channel.subscribers.pop(websocket, None)
+            if subscriber is not None and subscriber[1] is not asyncio.current_task():
+                subscriber[1].cancel()
+            if not channel.subscribers:
+                del self.channels[session_id]
+                channel.stop()
+        log.debug("[WS] Client disconnected from session %s", session_id)
+
+    async def close_session(self, session_id: str):
+        """Drop every subscriber of a session and stop its writer."""
+        channel = self.channels.pop(session_id, None)
+        if channel is None:
+            return
+        channel.stop()
+        for connection in list(channel.subscribers):
+            try:
+                await connection.close()
+            except Exception:
+                pass
+
+    async def broadcast(self, session_id: str, message: Union[dict, bytes]):
+        """
+        Queue a message for the session; bytes are sent as already-encoded JSON.
+        Nothing is done unless someone is subscribed.
+        """
+        self.publish(session_id, message)
+
+    def publish(self, session_id: str, message: Union[dict, bytes]):
+        """Synchronous form of broadcast() for callers that are not coroutines."""
+        channel = self.channels.get(session_id)
+        if channel is None:
+            return
+        if isinstance(message, dict):
+            kind = _debounce_kind(message)
+            if kind is not None:
+                # A flush is already scheduled for this kind: the latest message wins
+                if kind not in channel.pending:
+                    channel.flushers[kind] = asyncio.create_task(self._flush_after(channel, kind))
+                channel.pending[kind] = message
+                return
+        self._enqueue(channel, message)
+
+    @staticmethod
+    def _enqueue(channel: _Channel, message: Union[dict, bytes]):
+        """
+        Encode a dict message and hand it to the session writer, unless it is
+        the same as the last one. Messages without a timestamp are stamped here,
+        after the comparison, so repeated state still counts as unchanged.
+        """
+        if isinstance(message, dict):
+            body = dumps_json(message)
+            digest = hash(body)
+            if digest == channel.last_digest:
+                return
+            channel.last_digest = digest
+            if "timestamp" not in message and message:
+                body = body[:-1] + b',"timestamp":' + dumps_json(datetime.now()) + b"}"
+            message = body
+        channel.queue.put_nowait(message)
+
+    async def _flush_after(self, channel: _Channel, kind: str):
+        """Send the latest debounced message of one kind."""
+        await asyncio.sleep(WS_DEBOUNCE_SECONDS)
+        channel.flushers.pop(kind, None)
+        message = channel.pending.pop(kind, None)
+        if message is not None:
+            self._enqueue(channel, message)
+
+    @staticmethod
+    async def _writer(channel: _Channel):
+        """Drains the session's queue, packs each batch into one frame and hands it to every subscriber."""
+        queue = channel.queue
+        while True:
+            batch = [await queue.get()]
+            while True:
                 try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    print(f"[WS] Broadcast error: {e}")
-                    disconnected.add(connection)
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
 
-            for connection in disconnected:
-                await self.disconnect(session_id, connection)
+            payload = batch[0] if len(batch) == 1 else b"\n".join(batch)
+            if len(payload) > WS_COMPRESS_THRESHOLD_BYTES:
+                payload = WS_GZIP_TAG + gzip.compress(payload, compresslevel=6)
+
+            for outbox, _ in channel.subscribers.values():
+                if outbox.full():
+                    # Slow subscriber: drop its oldest frame rather than block
+                    outbox.get_nowait()
+                outbox.put_nowait(payload)
+
+    async def _sender(self, session_id: str, websocket: WebSocket, outbox: asyncio.Queue):
+        """Writes queued frames to one subscriber."""
+        while True:
+            payload = await outbox.get()
+            try:
+                await websocket.send_bytes(payload)
+            except Exception as e:
+                log.warning("[WS] Broadcast error on session %s: %s", session_id, e)
+                self.disconnect(session_id, websocket)
+                return
 
 
 manager = ConnectionManager()
 
 
+def _push_status_change(session_id: str, state: SessionState):
+    """Push every session status transition to WebSocket subscribers as it happens."""
+    manager.publish(session_id, {
+        "type": "session_status_update",
+        "status": state.status,
+        "ended": state.ended,
+    })
+
+
+session_store.on_status_change = _push_status_change
+
+
+async def _hold_until_disconnect(session_id: str, websocket: WebSocket):
+    """
+    Park a subscriber until it goes away. Keep-alive is handled by protocol
+    level pings (uvicorn ws_ping_interval), so client frames are ignored;
+    status is available from GET /session/{session_id}/status.
+    """
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        manager.disconnect(session_id, websocket)
+
+
+async def _session_gc_loop():
+    """
+    Periodically forget sessions that ended, and chat histories left idle,
+    more than SESSION_TTL_SECONDS ago.
+    """
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+        expired = session_store.sweep(SESSION_TTL_SECONDS)
+        for session_id in expired:
+            await manager.close_session(session_id)
+        if expired:
+            log.info("Expired %d ended session(s)", len(expired))
+
+        # Chat histories have no end event, so they expire after sitting idle
+        cutoff = time.monotonic() - SESSION_TTL_SECONDS
+        idle = 0
+        while _chat_last_used:
+            session_id, last_used = next(iter(_chat_last_used.items()))
+            if last_used >= cutoff:
+                break
+            del _chat_last_used[session_id]
+            chat_sessions.pop(session_id, None)
+            idle += 1
+        if idle:
+            log.info("Expired %d idle chat session(s)", idle)
+
+
+@app.on_event("startup")
+async def check_api_key():
+    if not GEMINI_API_KEY:
+        log.warning("GEMINI_API_KEY is not set; session endpoints will return 500")
+
+
+@app.on_event("startup")
+async def start_session_gc():
+    # Keep a reference so the task is not garbage collected
+    app.state.session_gc_task = asyncio.create_task(_session_gc_loop())
+
+
+@app.on_event("startup")
+async def open_http_client():
+    app.state.http_client = create_http_client()
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await app.state.http_client.aclose()
+
+
+# ---- Background workflows ----
+
+# Upper bound on orchestrations talking to Gemini at the same time; extra
+# sessions queue on the semaphore instead of piling onto the API.
+MAX_CONCURRENT_WORKFLOWS = 64
+_workflow_slots = asyncio.Semaphore(MAX_CONCURRENT_WORKFLOWS)
+_workflow_tasks: Set[asyncio.Task] = set()
+
+
+async def _run_bounded(coro):
+    async with _workflow_slots:
+        try:
+            await coro
+        except Exception:
+            log.exception("❌ Background workflow failed")
+
+
+def spawn_workflow(coro):
+    """Run a session workflow as a detached task, bounded by MAX_CONCURRENT_WORKFLOWS."""
+    task = asyncio.create_task(_run_bounded(coro))
+    # Keep a reference until the task finishes so it is not garbage collected
+    _workflow_tasks.add(task)
+    task.add_done_callback(_workflow_tasks.discard)
+
+
 # ---- Helper function to run the full workflow ----
 
 async def run_full_workflow(req: StartSessionRequest, session_id: str):
     """Runs the orchestration and coordinates with WebSocket clients."""
     try:
         # Initialize session state
-        active_sessions[session_id] = {
-            "status": "running",
-            "user_name": req.name,
-            "ended": False,
-            "reason": None,
-            "started_at": datetime.now().isoformat()
-        }
+        start_time = datetime.now()
+        session_store.update(session_id, status="running", started_at=start_time)
 
         # Broadcast to all connected clients
-        await manager.broadcast(session_id, {
-            "type": "session_started",
-            "user_name": req.name,
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
-        })
+        await manager.broadcast(
+            session_id,
+            _TPL_SESSION_STARTED % (dumps_json(req.name), dumps_json(session_id), dumps_json(start_time))
+        )
 
         async def on_session_end(reason: str):
             """Callback when the session ends."""
+            end_time = datetime.now()
+            duration = (end_time - start_time).total_seconds()
+
             print(f"\n👋 Session {session_id} ended: {reason}")
-            active_sessions[session_id] = {
+
+            session_data = {
                 "status": "ended",
                 "user_name": req.name,
                 "ended": True,
                 "reason": reason,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": end_time,
+                "started_at": start_time,
+                "ended_at": end_time,
+                "duration_seconds": duration
             }
 
-            # Broadcast session end to all clients
-            await manager.broadcast(session_id, {
-                "type": "session_ended",
-                "reason": reason,
-                "timestamp": datetime.now().isoformat()
-            })
+            session_store.update(session_id, **session_data)
+
+            # Broadcast session end to all clients with full details
+            await manager.broadcast(session_id, _TPL_SESSION_ENDED_DETAILED % (
+                dumps_json(reason), dumps_json(end_time), dumps_json(duration), dumps_json(session_data)
+            ))
 
         # Convert Pydantic input to internal UserContext
-        health_ctx = None
-        if req.health is not None:
-            health_ctx = HealthSnapshot(
-                steps_today=req.health.steps_today,
-                sleep_hours_last_night=req.health.sleep_hours_last_night,
-            )
-
-        user_ctx = UserContext(
-            name=req.name,
-            mood=req.mood,
-            health=health_ctx,
-            conversation_summary=req.conversation_summary,
-            goals=req.goals,
-        )
+        user_ctx = UserContext.from_dict(req.model_dump(exclude_none=True))
 
         print(f"\n📝 Processing request for user: {req.name} (Session: {session_id})")
 
-        # Run the orchestration with callback
-        from wellness_orchestrator_live import run_orchestration_with_callback
-        await run_orchestration_with_callback(user_ctx, on_session_end)
+        async def on_event(event: dict):
+            """Forward intermediate orchestration results to WebSocket subscribers."""
+            await manager.broadcast(session_id, {"type": "agent_event", **event})
+
+        # Run the orchestration with callbacks
+        await run_orchestration_with_callback(user_ctx, on_session_end, on_event)
+
+        # The orchestrator returns without calling on_session_end when the initial
+        # analysis or the voice session fails early; end the session here so /wait
+        # and /result waiters are woken instead of re-polling until it is swept.
+        state = session_store.get(session_id)
+        if state is not None and not state.ended:
+            await on_session_end("workflow_finished")
 
         print(f"✅ Workflow completed for {req.name}\n")
 
     except Exception as e:
-        print(f"❌ Error in workflow for {req.name}: {e}")
-        import traceback
-        traceback.print_exc()
-
-        active_sessions[session_id] = {
-            "status": "error",
-            "user_name": req.name,
-            "ended": True,
-            "reason": f"error: {str(e)}",
-            "timestamp": datetime.now().isoformat()
-        }
+        log.exception("❌ Error in workflow for %s", req.name)
+
+        failed_at = datetime.now()
+        session_store.update(
+            session_id,
+            status="error",
+            ended=True,
+            reason=f"error: {str(e)}",
+            timestamp=failed_at,
+            ended_at=failed_at,
+            error_details=str(e)
+        )
 
-        await manager.broadcast(session_id, {
-            "type": "session_error",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        })
+        await manager.broadcast(
+            session_id, _TPL_SESSION_ERROR % (dumps_json(str(e)), dumps_json(failed_at))
+        )
 
 
 # ---- REST Endpoints ----
@@ -296,23 +814,20 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    api_key = os.environ.get("GEMINI_API_KEY")
     return {
         "status": "healthy",
-        "api_key_configured": bool(api_key)
+        "api_key_configured": bool(GEMINI_API_KEY)
     }
 
 
 @app.post("/start-session", response_model=SessionResponse)
 async def start_session(
-        req: StartSessionRequest,
-        background_tasks: BackgroundTasks
+        req: StartSessionRequest
 ):
     """Starts the full multi-agent orchestration in the background."""
 
     # Validate API key
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
+    if not GEMINI_API_KEY:
         raise HTTPException(
             status_code=500,
             detail="GEMINI_API_KEY not configured on server"
@@ -326,11 +841,14 @@ async def start_session(
         )
 
     # Generate session ID
-    import uuid
-    session_id = f"session_{uuid.uuid4().hex[:8]}"
+    session_id = f"session_{secrets.token_hex(4)}"
+
+    # Register the session up front so /wait and WebSocket clients can attach
+    # before the background task has started
+    register_pending_session(session_id, req.name)
 
     # Run the full workflow in the background
-    background_tasks.add_task(run_full_workflow, req, session_id)
+    spawn_workflow(run_full_workflow(req, session_id))
 
     return SessionResponse(
         status="processing_started",
@@ -341,13 +859,14 @@ async def start_session(
 
 @app.post("/wellness-chat")
 async def wellness_chat(req: WellnessChatRequest):
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    agent_live = WellnessAgentLive(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
+    agent_live = WELLNESS_CHAT_AGENT
     if agent_live is None:
         raise HTTPException(status_code=500, detail="Wellness agent not initialized")
 
     # 1) Get or create history for this session
     history = chat_sessions.setdefault(req.session_id, [])
+    _chat_last_used[req.session_id] = time.monotonic()
+    _chat_last_used.move_to_end(req.session_id)
 
     # Is this the very first user message?
     is_first_turn = len(history) == 0
@@ -381,114 +900,54 @@ async def wellness_chat(req: WellnessChatRequest):
     }
 
 
-@app.get("/session/{session_id}/status")
-async def get_session_status(session_id: str):
-    """Check the status of a voice session."""
-    if session_id not in active_sessions:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Session {session_id} not found"
-        )
-
-    session_info = active_sessions[session_id]
-
-    return {
-        "session_id": session_id,
-        "user_name": session_info["user_name"],
-        "status": session_info["status"],
-        "ended": session_info["ended"],
-        "reason": session_info.get("reason"),
-        "timestamp": session_info.get("timestamp"),
-        "started_at": session_info.get("started_at")
-    }
-
-
-@app.websocket("/ws/session/{session_id}")
-async def websocket_endpoint(session_id: str, websocket: WebSocket):
-    """WebSocket endpoint for real-time session updates."""
-
-    # Validate session exists
-    if session_id not in active_sessions:
-        await websocket.close(code=4004, reason="Session not found")
-        return
-
-    await manager.connect(session_id, websocket)
-
-    # Send current session status
-    session_info = active_sessions[session_id]
-    await websocket.send_json({
-        "type": "session_status",
-        "status": session_info["status"],
-        "ended": session_info["ended"],
-        "user_name": session_info["user_name"]
-    })
-
-    try:
-        while True:
-            # Keep connection alive
-            data = await websocket.receive_text()
-
-            # Handle client messages (e.g., ping/pong)
-            if data == "ping":
-                await websocket.send_text("pong")
-            elif data == "get_status":
-                session_info = active_sessions.get(session_id, {})
-                await websocket.send_json({
-                    "type": "session_status",
-                    "status": session_info.get("status"),
-                    "ended": session_info.get("ended")
-                })
-
-    except WebSocketDisconnect:
-        await manager.disconnect(session_id, websocket)
-
-
 @app.get("/session/{session_id}/wait")
 async def wait_for_session_end(session_id: str):
-    """Long-polling endpoint that waits for the session to end."""
-    if session_id not in active_sessions:
+    """
+    Long-polling endpoint that waits for the session to end. Each request waits
+    at most LONG_POLL_MAX_WAIT_SECONDS and returns retry=True if the session is
+    still running; long-lived clients should prefer /ws/session/{session_id}.
+    """
+    state = session_store.get(session_id)
+    if state is None:
         raise HTTPException(
             status_code=404,
             detail=f"Session {session_id} not found"
         )
 
-    max_wait = 3600
-    poll_interval = 1
-    waited = 0
-
-    while waited < max_wait:
-        session_info = active_sessions[session_id]
-        if session_info["ended"]:
-            return {
-                "session_id": session_id,
-                "user_name": session_info["user_name"],
-                "status": session_info["status"],
-                "ended": True,
-                "reason": session_info.get("reason"),
-                "timestamp": session_info.get("timestamp")
-            }
-
-        await asyncio.sleep(poll_interval)
-        waited += poll_interval
+    session_info = await session_store.wait(session_id, timeout=LONG_POLL_MAX_WAIT_SECONDS)
+    if session_info is None:
+        return {
+            "session_id": session_id,
+            "ended": False,
+            "status": state.status,
+            "retry": True
+        }
 
-    return {
+    return drop_none({
         "session_id": session_id,
-        "ended": False,
-        "status": "timeout"
-    }
+        "user_name": session_info.user_name,
+        "status": session_info.status,
+        "ended": True,
+        "reason": session_info.reason,
+        "timestamp": session_info.timestamp
+    })
 
 
 @app.post("/events-near-me")
 async def events_near_me(query: EventsQuery):
     """Return events near given coordinates."""
+    # Coordinates rounded to ~100 m so nearby repeat lookups share a cache entry
+    cache_key = (round(query.lat, 3), round(query.lon, 3), query.radius_km, query.keyword, query.size)
+
     try:
-        events = await fetch_ticketmaster_events(
+        events = await events_near_me_cache.get_or_load(cache_key, lambda: fetch_ticketmaster_events(
             lat=query.lat,
             lon=query.lon,
             radius_km=query.radius_km,
             keyword=query.keyword,
             size=query.size,
-        )
+            client=app.state.http_client,
+        ))
         return {"events": events, "count": len(events)}
     except TicketmasterError as e:
         raise HTTPException(status_code=502, detail=str(e))
@@ -500,7 +959,10 @@ async def events_near_me(query: EventsQuery):
 async def social_events(query: SocialEventQuery):
     """Return social events matching the query."""
     try:
-        events = fetch_social_events_by_name(query.event_name)
+        events = await social_events_cache.get_or_load(
+            (query.event_name, query.substring),
+            lambda: fetch_social_events_by_name_async(query.event_name, query.substring),
+        )
         return {"events": events, "count": len(events)}
     except DatabaseError as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -523,6 +985,7 @@ async def test_workflow():
         goals="sleep better and be more active"
     )
 
+    register_pending_session("test_session", test_request.name)
     await run_full_workflow(test_request, "test_session")
 
 
@@ -533,13 +996,16 @@ async def mobile_audio_websocket(session_id: str, websocket: WebSocket):
 
     Protocol:
     Client -> Server:
+        - {"type": "start_audio_session", "binary_audio": true}  # First message; binary_audio is optional
         - {"type": "audio", "data": "<base64_audio>"}  # Send audio chunk
+        - binary frame: 0x01 + raw PCM                 # Same, without base64/JSON
         - {"type": "start_speaking"}  # User started speaking
         - {"type": "stop_speaking"}   # User stopped speaking
         - {"type": "end_session"}     # Request to end session
 
     Server -> Client:
         - {"type": "audio", "data": "<base64_audio>"}  # AI audio response
+        - binary frame: 0x02 + raw PCM                 # AI audio when binary_audio was requested
         - {"type": "agent_transcript", "text": "..."}  # AI's spoken text
         - {"type": "turn_complete"}                    # AI finished speaking
         - {"type": "live_analysis", ...}               # Real-time analysis
@@ -549,19 +1015,19 @@ async def mobile_audio_websocket(session_id: str, websocket: WebSocket):
     """
 
     # Validate session exists
-    if session_id not in active_sessions:
+    session_info = session_store.get(session_id)
+    if session_info is None:
         await websocket.close(code=4004, reason="Session not found")
         return
 
     await websocket.accept()
-    print(f"[Mobile Audio] Client connected to session {session_id}")
+    log.info("[Mobile Audio] Client connected to session %s", session_id)
 
-    session_info = active_sessions[session_id]
     audio_session: Optional[MobileAudioSession] = None
 
     try:
         # Wait for initial configuration from client
-        data = await websocket.receive_json()
+        data = loads_json(await websocket.receive_text())
 
         if data.get("type") != "start_audio_session":
             await websocket.close(code=4000, reason="Expected start_audio_session message")
@@ -569,22 +1035,20 @@ async def mobile_audio_websocket(session_id: str, websocket: WebSocket):
 
         # Get system prompt and context from the completed orchestration
         # These should have been generated during the initial /start-session call
-        system_prompt = session_info.get('system_prompt', WELLNESS_SYSTEM_PROMPT)
-        initial_context = session_info.get('initial_context', '')
+        system_prompt = session_info.system_prompt or WELLNESS_SYSTEM_PROMPT
+        initial_context = session_info.initial_context
 
         # Create user context for audio session
         user_context = {
-            'name': session_info['user_name'],
-            'health_data': session_info.get('health_data', {})
+            'name': session_info.user_name,
+            'health_data': session_info.health_data
         }
 
-        # Get API key
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            await websocket.send_json({
+        if not GEMINI_API_KEY:
+            await websocket.send_text(encode_message({
                 "type": "error",
                 "message": "Server API key not configured"
-            })
+            }))
             await websocket.close()
             return
 
@@ -592,86 +1056,93 @@ async def mobile_audio_websocket(session_id: str, websocket: WebSocket):
         audio_session = await mobile_session_manager.create_session(
             session_id=session_id,
             user_context=user_context,
-            api_key=api_key,
+            api_key=GEMINI_API_KEY,
             websocket=websocket,
             initial_system_prompt=system_prompt,
-            initial_context=initial_context
+            initial_context=initial_context,
+            binary_audio=bool(data.get("binary_audio")),
         )
 
         # Send confirmation
-        await websocket.send_json({
+        await websocket.send_text(encode_message({
             "type": "audio_session_started",
             "session_id": session_id
-        })
+        }))
 
-        # Handle incoming messages from client
-        while audio_session.is_active:
-            try:
-                message = await asyncio.wait_for(
-                    websocket.receive(),
-                    timeout=0.1
-                )
-
-                # Handle different message types
-                if message['type'] == 'websocket.receive':
-                    if 'text' in message:
-                        data = json.loads(message['text'])
-
-                        if data['type'] == 'audio':
-                            # Decode base64 audio and send to Gemini
-                            audio_bytes = base64.b64decode(data['data'])
-                            await audio_session.process_audio_from_client(audio_bytes)
-
-                        elif data['type'] == 'end_session':
-                            print(f"[Mobile Audio] Client requested session end")
-                            await audio_session.end_session("client_requested")
-                            break
-
-                        elif data['type'] == 'user_transcript':
-                            # Client is sending their own transcript
-                            if audio_session.live_coordinator:
-                                await audio_session.live_coordinator.add_transcript(
-                                    "user",
-                                    data.get('text', '')
-                                )
-
-                elif message['type'] == 'websocket.disconnect':
-                    print(f"[Mobile Audio] Client disconnected")
-                    break
+        async def pump_client_messages():
+            """Handle incoming messages from the client until it disconnects or ends the session."""
+            while True:
+                try:
+                    message = await websocket.receive()
+
+                    # Handle different message types
+                    if message['type'] == 'websocket.receive':
+                        raw = message.get('bytes')
+                        if raw:
+                            # Binary audio frame: opcode byte + raw PCM, no JSON or base64
+                            if raw[0] == CLIENT_AUDIO_OPCODE:
+                                await audio_session.process_audio_from_client(raw[1:])
+
+                        elif message.get('text') is not None:
+                            data = loads_json(message['text'])
+
+                            if data['type'] == 'audio':
+                                # Decode base64 audio and send to Gemini; a2b_base64 reads the str
+                                # directly, b64decode would first copy it into ASCII bytes
+                                audio_bytes = binascii.a2b_base64(data["data"])
+                                await audio_session.process_audio_from_client(audio_bytes)
+
+                            elif data['type'] == 'end_session':
+                                log.info("[Mobile Audio] Client requested end of session %s", session_id)
+                                await audio_session.end_session("client_requested")
+                                return
+
+                            elif data['type'] == 'user_transcript':
+                                # Client is sending their own transcript
+                                if audio_session.live_coordinator:
+                                    await audio_session.live_coordinator.add_transcript(
+                                        "user",
+                                        data.get('text', '')
+                                    )
+
+                    elif message['type'] == 'websocket.disconnect':
+                        log.info("[Mobile Audio] Client disconnected from session %s", session_id)
+                        return
 
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                print(f"[Mobile Audio] Error receiving message: {e}")
-                break
+                except Exception as e:
+                    log.warning("[Mobile Audio] Error receiving message on session %s: %s", session_id, e)
+                    return
+
+        # Block on real events only: a client message or the audio session
+        # ending on its own (e.g. the model calling end_session_tool).
+        reader = asyncio.create_task(pump_client_messages())
+        closed = asyncio.create_task(audio_session.closed_event.wait())
+        try:
+            await asyncio.wait({reader, closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            reader.cancel()
+            closed.cancel()
 
     except Exception as e:
-        print(f"[Mobile Audio] Session error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("[Mobile Audio] Session error")
 
         try:
-            await websocket.send_json({
+            await websocket.send_text(encode_message({
                 "type": "error",
                 "message": str(e)
-            })
+            }))
         except:
             pass
 
     finally:
-        print(f"[Mobile Audio] Cleaning up session {session_id}")
+        log.info("[Mobile Audio] Cleaning up session %s", session_id)
 
-        # Clean up audio session
+        # Clean up audio session and drop it from the manager's registry
         if audio_session:
-            await audio_session.end_session("connection_closed")
+            await mobile_session_manager.end_session(session_id, "connection_closed")
 
         # Update session state
-        if session_id in active_sessions:
-            active_sessions[session_id].update({
-                "status": "ended",
-                "ended": True,
-                "ended_at": datetime.now().isoformat()
-            })
+        session_store.update(session_id, status="ended", ended=True, ended_at=datetime.now())
 
         try:
             await websocket.close()
@@ -682,8 +1153,7 @@ async def mobile_audio_websocket(session_id: str, websocket: WebSocket):
 # Modified start-session endpoint to prepare for mobile audio
 @app.post("/start-session-mobile", response_model=SessionResponse)
 async def start_session_mobile(
-        req: StartSessionRequest,
-        background_tasks: BackgroundTasks
+        req: StartSessionRequest
 ):
     """
     Starts the orchestration for mobile clients.
@@ -691,8 +1161,7 @@ async def start_session_mobile(
     """
 
     # Validate API key
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
+    if not GEMINI_API_KEY:
         raise HTTPException(
             status_code=500,
             detail="GEMINI_API_KEY not configured on server"
@@ -706,11 +1175,13 @@ async def start_session_mobile(
         )
 
     # Generate session ID
-    import uuid
-    session_id = f"session_{uuid.uuid4().hex[:8]}"
+    session_id = f"session_{secrets.token_hex(4)}"
+
+    # Register the session up front so clients can attach before orchestration starts
+    register_pending_session(session_id, req.name)
 
     # Run initial orchestration to get context
-    background_tasks.add_task(run_mobile_orchestration, req, session_id)
+    spawn_workflow(run_mobile_orchestration(req, session_id))
 
     return SessionResponse(
         status="orchestration_started",
@@ -729,32 +1200,25 @@ async def run_mobile_orchestration(req: StartSessionRequest, session_id: str):
         start_time = datetime.now()
 
         # Initialize session state
-        active_sessions[session_id] = {
-            "status": "orchestrating",
-            "user_name": req.name,
-            "ended": False,
-            "reason": None,
-            "started_at": start_time.isoformat(),
-            "ended_at": None,
-            "duration_seconds": None,
-            "health_data": {
+        session_store.update(
+            session_id,
+            status="orchestrating",
+            started_at=start_time,
+            health_data={
                 "steps_today": req.health.steps_today if req.health else 0,
                 "sleep_hours_last_night": req.health.sleep_hours_last_night if req.health else 0.0,
             }
-        }
+        )
 
         # Broadcast orchestration started
         await manager.broadcast(session_id, {
             "type": "orchestration_started",
             "user_name": req.name,
             "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": start_time
         })
 
         # Run initial agent orchestration
-        from agents import SentimentAgent, SocialAgent, HealthAgent, AgentState, generate_final_prompt
-        from wellness_orchestrator_live import app as graph_app
-
         initial_state = AgentState(
             messages=[],
             user_name=req.name,
@@ -771,53 +1235,54 @@ async def run_mobile_orchestration(req: StartSessionRequest, session_id: str):
             final_context_prompt="",
         )
 
-        print(f"[Mobile Session {session_id}] Running initial orchestration...")
+        log.info("[Mobile Session %s] Running initial orchestration...", session_id)
         final_state = await graph_app.ainvoke(initial_state, config={"recursion_limit": 10})
 
         # Store results in session
         final_prompt = final_state.get('final_context_prompt', '')
 
-        active_sessions[session_id].update({
-            "status": "orchestration_complete",
-            "system_prompt": WELLNESS_SYSTEM_PROMPT,
-            "initial_context": final_prompt,
-            "mood_score": final_state.get('mood_score'),
-            "health_score": final_state.get('health_score'),
-            "mood_analysis": final_state.get('mood_analysis'),
-            "social_suggestion": final_state.get('social_suggestion'),
-            "health_suggestion": final_state.get('health_suggestion')
-        })
+        session_store.update(
+            session_id,
+            status="orchestration_complete",
+            system_prompt=WELLNESS_SYSTEM_PROMPT,
+            initial_context=final_prompt,
+            mood_score=final_state.get('mood_score'),
+            health_score=final_state.get('health_score'),
+            mood_analysis=final_state.get('mood_analysis'),
+            social_suggestion=final_state.get('social_suggestion'),
+            health_suggestion=final_state.get('health_suggestion')
+        )
 
         # Notify client that orchestration is complete
         await manager.broadcast(session_id, {
             "type": "orchestration_complete",
             "session_id": session_id,
             "message": "Ready for audio streaming. Connect to /ws/audio/{session_id}",
-            "timestamp": datetime.now().isoformat(),
             "initial_analysis": {
                 "mood_score": final_state.get('mood_score'),
                 "health_score": final_state.get('health_score')
             }
         })
 
-        print(f"[Mobile Session {session_id}] Orchestration complete, ready for audio")
+        log.info("[Mobile Session %s] Orchestration complete, ready for audio", session_id)
 
     except Exception as e:
-        print(f"[Mobile Session {session_id}] Orchestration error: {e}")
-        import traceback
-        traceback.print_exc()
-
-        active_sessions[session_id].update({
-            "status": "error",
-            "ended": True,
-            "reason": f"orchestration_error: {str(e)}",
-            "error_details": str(e)
-        })
+        log.exception("[Mobile Session %s] Orchestration error", session_id)
+
+        failed_at = datetime.now()
+        session_store.update(
+            session_id,
+            status="error",
+            ended=True,
+            reason=f"orchestration_error: {str(e)}",
+            timestamp=failed_at,
+            ended_at=failed_at,
+            error_details=str(e)
+        )
 
         await manager.broadcast(session_id, {
             "type": "orchestration_error",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "error": str(e)
         })
 
 
@@ -825,160 +1290,57 @@ async def run_mobile_orchestration(req: StartSessionRequest, session_id: str):
 @app.get("/session/{session_id}/ready")
 async def check_audio_ready(session_id: str):
     """Check if session orchestration is complete and ready for audio streaming."""
-    if session_id not in active_sessions:
+    session_info = session_store.get(session_id)
+    if session_info is None:
         raise HTTPException(status_code=404, detail="Session not found")
-
-    session_info = active_sessions[session_id]
-    status = session_info.get("status")
+    status = session_info.status
 
     return {
         "session_id": session_id,
         "status": status,
         "ready": status == "orchestration_complete",
         "initial_analysis": {
-            "mood_score": session_info.get("mood_score"),
-            "health_score": session_info.get("health_score"),
-            "mood_analysis": session_info.get("mood_analysis"),
-            "social_suggestion": session_info.get("social_suggestion"),
-            "health_suggestion": session_info.get("health_suggestion")
+            "mood_score": session_info.mood_score,
+            "health_score": session_info.health_score,
+            "mood_analysis": session_info.mood_analysis,
+            "social_suggestion": session_info.social_suggestion,
+            "health_suggestion": session_info.health_suggestion
         } if status == "orchestration_complete" else None
     }
 
-# Add this to your api.py
-
-# Update the run_full_workflow function to store more detailed end information
-async def run_full_workflow(req: StartSessionRequest, session_id: str):
-    """Runs the orchestration and coordinates with WebSocket clients."""
-    try:
-        # Initialize session state
-        active_sessions[session_id] = {
-            "status": "running",
-            "user_name": req.name,
-            "ended": False,
-            "reason": None,
-            "started_at": datetime.now().isoformat(),
-            "ended_at": None,
-            "duration_seconds": None
-        }
-
-        start_time = datetime.now()
-
-        # Broadcast to all connected clients
-        await manager.broadcast(session_id, {
-            "type": "session_started",
-            "user_name": req.name,
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
-        })
-
-        async def on_session_end(reason: str):
-            """Callback when the session ends."""
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-
-            print(f"\n👋 Session {session_id} ended: {reason}")
-
-            session_data = {
-                "status": "ended",
-                "user_name": req.name,
-                "ended": True,
-                "reason": reason,
-                "timestamp": end_time.isoformat(),
-                "started_at": start_time.isoformat(),
-                "ended_at": end_time.isoformat(),
-                "duration_seconds": duration
-            }
-
-            active_sessions[session_id] = session_data
-
-            # Broadcast session end to all clients with full details
-            await manager.broadcast(session_id, {
-                "type": "session_ended",
-                "reason": reason,
-                "timestamp": end_time.isoformat(),
-                "duration_seconds": duration,
-                "session_data": session_data
-            })
-
-        # Convert Pydantic input to internal UserContext
-        health_ctx = None
-        if req.health is not None:
-            health_ctx = HealthSnapshot(
-                steps_today=req.health.steps_today,
-                sleep_hours_last_night=req.health.sleep_hours_last_night,
-            )
-
-        user_ctx = UserContext(
-            name=req.name,
-            mood=req.mood,
-            health=health_ctx,
-            conversation_summary=req.conversation_summary,
-            goals=req.goals,
-        )
-
-        print(f"\n📝 Processing request for user: {req.name} (Session: {session_id})")
-
-        # Run the orchestration with callback
-        from wellness_orchestrator_live import run_orchestration_with_callback
-        await run_orchestration_with_callback(user_ctx, on_session_end)
-
-        print(f"✅ Workflow completed for {req.name}\n")
-
-    except Exception as e:
-        print(f"❌ Error in workflow for {req.name}: {e}")
-        import traceback
-        traceback.print_exc()
-
-        active_sessions[session_id] = {
-            "status": "error",
-            "user_name": req.name,
-            "ended": True,
-            "reason": f"error: {str(e)}",
-            "timestamp": datetime.now().isoformat(),
-            "error_details": str(e)
-        }
-
-        await manager.broadcast(session_id, {
-            "type": "session_error",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        })
-
 
 # Enhanced status endpoint with more details
 @app.get("/session/{session_id}/status")
 async def get_session_status(session_id: str):
     """Check the status of a voice session with full details."""
-    if session_id not in active_sessions:
+    session_info = session_store.get(session_id)
+    if session_info is None:
         raise HTTPException(
             status_code=404,
             detail=f"Session {session_id} not found"
         )
 
-    session_info = active_sessions[session_id]
-
     response = {
         "session_id": session_id,
-        "user_name": session_info["user_name"],
-        "status": session_info["status"],
-        "ended": session_info["ended"],
-        "started_at": session_info.get("started_at")
+        "user_name": session_info.user_name,
+        "status": session_info.status,
+        "ended": session_info.ended,
+        "started_at": session_info.started_at
     }
 
     # Add end details if session has ended
-    if session_info["ended"]:
+    if session_info.ended:
         response.update({
-            "reason": session_info.get("reason"),
-            "ended_at": session_info.get("ended_at"),
-            "timestamp": session_info.get("timestamp"),
-            "duration_seconds": session_info.get("duration_seconds"),
+            "reason": session_info.reason,
+            "ended_at": session_info.ended_at,
+            "timestamp": session_info.timestamp,
+            "duration_seconds": session_info.duration_seconds,
         })
 
     # Add error details if present
-    if "error_details" in session_info:
-        response["error_details"] = session_info["error_details"]
+    response["error_details"] = session_info.error_details
 
-    return response
+    return drop_none(response)
 
 
 # New endpoint: Wait for session end with full details
@@ -987,44 +1349,29 @@ async def wait_for_session_result(session_id: str):
     """
     Long-polling endpoint that waits for the session to end and returns complete results.
     This is useful for clients that want to get the final outcome without WebSockets.
+    Waits are capped like /wait; re-poll while the response has retry=True.
     """
-    if session_id not in active_sessions:
+    state = session_store.get(session_id)
+    if state is None:
         raise HTTPException(
             status_code=404,
             detail=f"Session {session_id} not found"
         )
 
-    max_wait = 3600  # 1 hour max
-    poll_interval = 0.5
-    waited = 0
-
-    while waited < max_wait:
-        session_info = active_sessions[session_id]
-
-        if session_info["ended"]:
-            return {
-                "session_id": session_id,
-                "user_name": session_info["user_name"],
-                "status": session_info["status"],
-                "ended": True,
-                "reason": session_info.get("reason"),
-                "started_at": session_info.get("started_at"),
-                "ended_at": session_info.get("ended_at"),
-                "timestamp": session_info.get("timestamp"),
-                "duration_seconds": session_info.get("duration_seconds"),
-                "error_details": session_info.get("error_details")
-            }
-
-        await asyncio.sleep(poll_interval)
-        waited += poll_interval
+    session_info = await session_store.wait(session_id, timeout=LONG_POLL_MAX_WAIT_SECONDS)
+    if session_info is None:
+        # Timeout reached; the client should poll again
+        return {
+            "session_id": session_id,
+            "ended": False,
+            "status": state.status,
+            "retry": True,
+            "waited_seconds": LONG_POLL_MAX_WAIT_SECONDS
+        }
 
-    # Timeout reached
-    return {
-        "session_id": session_id,
-        "ended": False,
-        "status": "timeout",
-        "waited_seconds": waited
-    }
+    response = {"session_id": session_id, "ended": True}
+    response.update(zip(_SESSION_RESULT_FIELDS, _session_result_values(session_info)))
+    return drop_none(response)
 
 
 # Enhanced WebSocket endpoint with better messaging
@@ -1033,61 +1380,57 @@ async def websocket_endpoint(session_id: str, websocket: WebSocket):
     """WebSocket endpoint for real-time session updates with full details."""
 
     # Validate session exists
-    if session_id not in active_sessions:
+    session_info = session_store.get(session_id)
+    if session_info is None:
         await websocket.close(code=4004, reason="Session not found")
         return
 
-    await manager.connect(session_id, websocket)
-
-    # Send current session status
-    session_info = active_sessions[session_id]
-    await websocket.send_json({
+    # Current session status goes out as the first frame through the client's outbox
+    await manager.connect(session_id, websocket, snapshot=lambda: drop_none({
         "type": "session_status",
-        "status": session_info["status"],
-        "ended": session_info["ended"],
-        "user_name": session_info["user_name"],
-        "started_at": session_info.get("started_at")
-    })
+        "status": session_info.status,
+        "ended": session_info.ended,
+        "user_name": session_info.user_name,
+        "started_at": session_info.started_at
+    }))
 
-    try:
-        while True:
-            # Keep connection alive and handle client messages
-            data = await websocket.receive_text()
-
-            # Handle client messages
-            if data == "ping":
-                await websocket.send_text("pong")
-            elif data == "get_status":
-                session_info = active_sessions.get(session_id, {})
-                response = {
-                    "type": "session_status",
-                    "status": session_info.get("status"),
-                    "ended": session_info.get("ended")
-                }
-
-                # Include end details if available
-                if session_info.get("ended"):
-                    response.update({
-                        "reason": session_info.get("reason"),
-                        "ended_at": session_info.get("ended_at"),
-                        "duration_seconds": session_info.get("duration_seconds")
-                    })
-
-                await websocket.send_json(response)
-
-    except WebSocketDisconnect:
-        await manager.disconnect(session_id, websocket)
+    await _hold_until_disconnect(session_id, websocket)
 
 if __name__ == "__main__":
     import sys
 
+    # uvloop/httptools are optional; fall back to asyncio/h11 when they are missing
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    try:
+        import httptools  # noqa: F401
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "h11"
+
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         print("Running in test mode...")
-        if sys.platform == 'win32':
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        elif sys.platform == 'win32':
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
         asyncio.run(test_workflow())
     else:
         print("Starting Wellness Agent API server...")
         print("API docs at: http://localhost:8000/docs")
         print("Frontend: Open wellness_frontend.html in your browser")
-        uvicorn.run(app, host="0.0.0.0", port=8000)
+
+        loop_impl = "uvloop" if uvloop is not None else "asyncio"
+        print(f"Event loop: {loop_impl}, HTTP parser: {http_impl}")
+        uvicorn.run(
+            app,
+            host="0.0.0.0",
+            port=8000,
+            loop=loop_impl,
+            http=http_impl,
+            ws_ping_interval=WS_PING_INTERVAL_SECONDS,
+            ws_ping_timeout=WS_PING_TIMEOUT_SECONDS,
+            ws_per_message_deflate=False,
+        )
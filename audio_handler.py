@@ -6,12 +6,61 @@ Integrates client audio input directly with Gemini's real-time processing.
 
 import asyncio
 import base64
+import contextlib
 import io
+import logging
+import time
 from typing import Optional, AsyncGenerator
 from google import genai
 from google.genai import types
 import os
 
+# Child of the "api" logger, so records go through its queue handler and level
+log = logging.getLogger("api.gemini_live")
+
+# Live connections are reused across turns, but recycled once they get this old
+LIVE_SESSION_MAX_AGE_SECONDS = 10 * 60
+
+# Client audio at least this large is wrapped in a worker thread; below it the
+# thread hop costs more than the copy it saves the event loop
+AUDIO_BLOB_THREAD_THRESHOLD = 256 * 1024
+
+AUDIO_MIME_TYPE = "audio/webm"  # or "audio/wav" depending on client
+
+_WELLNESS_PROMPT = """
+You are a warm, calm, and empathetic wellness companion.
+
+Goals:
+- Check in on how the user is feeling emotionally and mentally.
+- Ask gentle, open questions. Listen more than you speak.
+- Offer simple coping strategies (breathing, journaling, short breaks).
+- Encourage self-compassion and normalize common struggles.
+
+Boundaries:
+- You are NOT a therapist and cannot give medical or legal advice.
+- If the user mentions self-harm, suicide, or being in danger, tell them clearly
+  to immediately contact local emergency services or a trusted person and seek
+  professional help.
+
+Style:
+- Speak slowly and clearly, in short sentences.
+- Avoid jargon. Be kind, non-judgmental, and validating.
+"""
+
+# Every audio session uses the same voice and prompt, so the config is built
+# once and shared; treat it as read-only
+_LIVE_CONFIG = types.LiveConnectConfig(
+    response_modalities=["AUDIO"],
+    speech_config=types.SpeechConfig(
+        voice_config=types.VoiceConfig(
+            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                voice_name="Zephyr"
+            )
+        )
+    ),
+    system_instruction=_WELLNESS_PROMPT,
+)
+
 
 class GeminiLiveAudioHandler:
     """Manages audio streaming with Gemini Live API."""
@@ -28,49 +77,65 @@ class GeminiLiveAudioHandler:
     async def create_audio_session(self, session_id: str, user_name: str) -> str:
         """Create a new Gemini Live session for audio streaming."""
 
-        config = types.LiveConnectConfig(
-            response_modalities=["AUDIO"],
-            speech_config=types.SpeechConfig(
-                voice_config=types.VoiceConfig(
-                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                        voice_name="Zephyr"
-                    )
-                )
-            ),
-            system_instruction=self._get_wellness_prompt(),
-        )
-
-        # Store session info for later use
+        # Store session info for later use; the live connection is opened on the first turn
         self.active_sessions[session_id] = {
             "user_name": user_name,
-            "config": config,
-            "session": None
+            "config": _LIVE_CONFIG,
+            "session": None,
+            "stack": None,
+            "opened_at": 0.0,
+            # Held for a whole turn, so turns on one connection never interleave
+            "lock": asyncio.Lock(),
         }
 
-        print(f"[Gemini Live] Created audio session for {user_name} ({session_id})")
+        log.info("[Gemini Live] Created audio session for %s (%s)", user_name, session_id)
         return session_id
 
-    def _get_wellness_prompt(self) -> str:
-        """Get the wellness system prompt."""
-        return """
-You are a warm, calm, and empathetic wellness companion.
+    async def _ensure_live(self, session_info: dict):
+        """
+        Return the session's open Gemini Live connection, connecting on first use
+        and replacing one older than LIVE_SESSION_MAX_AGE_SECONDS. The caller
+        must hold session_info["lock"].
+        """
+        if (session_info["session"] is not None
+                and time.monotonic() - session_info["opened_at"] > LIVE_SESSION_MAX_AGE_SECONDS):
+            await self._close_live(session_info)
+
+        if session_info["session"] is None:
+            stack = contextlib.AsyncExitStack()
+            session_info["session"] = await stack.enter_async_context(
+                self.client.aio.live.connect(
+                    model=self.model_id,
+                    config=session_info["config"]
+                )
+            )
+            session_info["stack"] = stack
+            session_info["opened_at"] = time.monotonic()
 
-Goals:
-- Check in on how the user is feeling emotionally and mentally.
-- Ask gentle, open questions. Listen more than you speak.
-- Offer simple coping strategies (breathing, journaling, short breaks).
-- Encourage self-compassion and normalize common struggles.
+        return session_info["session"]
 
-Boundaries:
-- You are NOT a therapist and cannot give medical or legal advice.
-- If the user mentions self-harm, suicide, or being in danger, tell them clearly
-  to immediately contact local emergency services or a trusted person and seek
-  professional help.
+    @staticmethod
+    async def _audio_blob(audio_bytes) -> types.Blob:
+        """
+        Wrap client audio in a Blob. Large uploads (and bytearray/memoryview
+        input, which has to be copied to bytes) are built off the event loop.
+        """
+        if isinstance(audio_bytes, bytes) and len(audio_bytes) < AUDIO_BLOB_THREAD_THRESHOLD:
+            return types.Blob(data=audio_bytes, mime_type=AUDIO_MIME_TYPE)
+        return await asyncio.to_thread(
+            lambda: types.Blob(data=bytes(audio_bytes), mime_type=AUDIO_MIME_TYPE)
+        )
 
-Style:
-- Speak slowly and clearly, in short sentences.
-- Avoid jargon. Be kind, non-judgmental, and validating.
-"""
+    async def _close_live(self, session_info: dict):
+        """Close the session's live connection, if one is open."""
+        stack = session_info["stack"]
+        session_info["session"] = None
+        session_info["stack"] = None
+        if stack is not None:
+            try:
+                await stack.aclose()
+            except Exception as e:
+                log.warning("[Gemini Live] Error closing live connection: %s", e)
 
     async def process_audio_stream(
             self,
@@ -92,25 +157,21 @@ Style:
             raise ValueError(f"Session {session_id} not found")
 
         session_info = self.active_sessions[session_id]
+        # Built before taking the lock, so it overlaps another turn still in flight
+        blob = await self._audio_blob(audio_bytes)
 
-        try:
-            # Create or reuse Gemini Live connection
-            async with self.client.aio.live.connect(
-                    model=self.model_id,
-                    config=session_info["config"]
-            ) as live_session:
+        async with session_info["lock"]:
+            turn_complete = False
+            try:
+                # Reuse the session's Gemini Live connection
+                live_session = await self._ensure_live(session_info)
 
                 # Send audio to Gemini
-                print(f"[Gemini Live] Sending audio ({len(audio_bytes)} bytes) to Gemini...")
-                await live_session.send_realtime_input(
-                    audio=types.Blob(
-                        data=audio_bytes,
-                        mime_type="audio/webm"  # or "audio/wav" depending on client
-                    )
-                )
+                log.debug("[Gemini Live] Sending audio (%d bytes) to Gemini...", len(audio_bytes))
+                await live_session.send_realtime_input(audio=blob)
 
                 # Receive and yield response audio
-                response_audio_chunks = []
+                total_bytes = 0
                 async for response in live_session.receive():
                     server_content = response.server_content
 
@@ -119,19 +180,25 @@ Style:
                             # Yield audio data if present
                             if part.inline_data:
                                 chunk = part.inline_data.data
-                                response_audio_chunks.append(chunk)
+                                total_bytes += len(chunk)
                                 yield chunk
-                                print(f"[Gemini Live] Yielding {len(chunk)} bytes")
+                                log.debug("[Gemini Live] Yielding %d bytes", len(chunk))
 
                     # Stop when turn is complete
                     if server_content and server_content.turn_complete:
-                        print(
-                            f"[Gemini Live] Turn complete, total response: {sum(len(c) for c in response_audio_chunks)} bytes")
+                        log.debug("[Gemini Live] Turn complete, total response: %d bytes", total_bytes)
+                        turn_complete = True
                         break
 
-        except Exception as e:
-            print(f"[Gemini Live] Error: {e}")
-            raise
+            except Exception as e:
+                log.warning("[Gemini Live] Error: %s", e)
+                raise
+
+            finally:
+                # A turn cut short (error, or the caller stopped iterating) would
+                # leave its remaining responses on the connection for the next one
+                if not turn_complete:
+                    await self._close_live(session_info)
 
     async def get_text_response(
             self,
@@ -149,24 +216,19 @@ Style:
             raise ValueError(f"Session {session_id} not found")
 
         session_info = self.active_sessions[session_id]
-        transcribed_text = ""
-        response_audio = b""
+        text_parts = []
+        response_audio = bytearray()
+        blob = await self._audio_blob(audio_bytes)
 
-        try:
-            async with self.client.aio.live.connect(
-                    model=self.model_id,
-                    config=session_info["config"]
-            ) as live_session:
+        async with session_info["lock"]:
+            turn_complete = False
+            try:
+                live_session = await self._ensure_live(session_info)
 
-                print(f"[Gemini Live] Processing audio for transcription and response...")
+                log.debug("[Gemini Live] Processing audio for transcription and response...")
 
                 # Send audio input
-                await live_session.send_realtime_input(
-                    audio=types.Blob(
-                        data=audio_bytes,
-                        mime_type="audio/webm"
-                    )
-                )
+                await live_session.send_realtime_input(audio=blob)
 
                 # Receive responses
                 async for response in live_session.receive():
@@ -175,36 +237,44 @@ Style:
                     if server_content:
                         # Extract text (user's transcribed speech)
                         if hasattr(server_content, 'interrupted') and server_content.interrupted:
-                            print(f"[Gemini Live] User interrupted")
+                            log.debug("[Gemini Live] User interrupted")
 
                         # Get model's response
                         if server_content.model_turn:
                             for part in server_content.model_turn.parts:
                                 # Extract audio response
                                 if part.inline_data:
-                                    response_audio += part.inline_data.data
+                                    response_audio.extend(part.inline_data.data)
 
                                 # Extract text response
                                 if hasattr(part, 'text') and part.text:
-                                    transcribed_text += part.text
+                                    text_parts.append(part.text)
 
                         # Stop when turn is complete
                         if server_content.turn_complete:
-                            print(f"[Gemini Live] Received {len(response_audio)} bytes of audio response")
-                            print(f"[Gemini Live] Response text: {transcribed_text[:100]}...")
+                            turn_complete = True
                             break
 
-            return transcribed_text, response_audio
+                transcribed_text = "".join(text_parts)
+                log.debug("[Gemini Live] Received %d bytes of audio response", len(response_audio))
+                log.debug("[Gemini Live] Response text: %.100s...", transcribed_text)
+                return transcribed_text, bytes(response_audio)
+
+            except Exception as e:
+                log.warning("[Gemini Live] Error in get_text_response: %s", e)
+                raise
 
-        except Exception as e:
-            print(f"[Gemini Live] Error in get_text_response: {e}")
-            raise
+            finally:
+                if not turn_complete:
+                    await self._close_live(session_info)
 
     async def close_session(self, session_id: str):
         """Close a session."""
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
-            print(f"[Gemini Live] Closed session {session_id}")
+        session_info = self.active_sessions.pop(session_id, None)
+        if session_info is not None:
+            async with session_info["lock"]:
+                await self._close_live(session_info)
+            log.info("[Gemini Live] Closed session %s", session_id)
 
 
 # Global instance
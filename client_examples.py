@@ -2,241 +2,300 @@
 
 import asyncio
 import aiohttp
+import gzip
 import json
-from typing import Optional
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+from typing import Literal, Optional
+
+_loads = orjson.loads if orjson else json.loads
+
+
+def decode_ws_messages(msg) -> list:
+    """
+    Decode a /ws/session frame into a list of messages.
+    The server sends JSON in binary frames and may batch several messages as
+    newline-delimited JSON. Large frames are gzipped and prefixed with a 0x01 byte.
+    """
+    data = msg.data if isinstance(msg.data, bytes) else msg.data.encode()
+    if data[:1] == b"\x01":
+        data = gzip.decompress(data[1:])
+    return [_loads(line) for line in data.split(b"\n") if line]
+
+
+def _print_session_end(heading: str, data: dict, detailed: bool = False):
+    """Print the summary of an ended session; duration may be null for failed sessions."""
+    reason = data.get("reason")
+    duration = data.get("duration_seconds") or 0
+    print(f"\n{heading}")
+    if detailed:
+        print(f"{'=' * 60}")
+    print(f"   Reason: {reason}")
+    print(f"   Duration: {duration:.1f}s")
+    if detailed:
+        print(f"   Ended at: {data.get('timestamp')}")
+        print(f"{'=' * 60}")
 
 
 # ============================================================================
-# Example 1: Simple HTTP Polling Client
+# Wellness API Client
 # ============================================================================
 
-class PollingClient:
+ClientMode = Literal["poll", "ws", "hybrid"]
+
+
+class WellnessClient:
     """
-    Simple client that starts a session and polls for status updates.
-    Good for: Simple integrations, serverless functions, basic scripts
+    Example client for the wellness API. Sessions are always started over
+    HTTP; `mode` picks how wait() detects that the session has ended:
+
+    - "poll":   HTTP long poll / status polling.
+                Good for: Simple integrations, serverless functions, basic scripts
+    - "ws":     WebSocket, printing every update as it arrives.
+                Good for: Interactive applications, dashboards, mobile apps
+    - "hybrid": WebSocket updates, ending via either HTTP or WebSocket (recommended)
+
+    One aiohttp session is created on first use and shared by all requests,
+    so they reuse pooled keep-alive connections. Use the client as an
+    `async with` block, or call aclose() when done.
     """
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    MODES = ("poll", "ws", "hybrid")
+
+    def __init__(self, base_url: str = "http://localhost:8000", mode: ClientMode = "hybrid"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown client mode {mode!r}; expected one of {self.MODES}")
         self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
+        self.mode = mode
         self.session_id: Optional[str] = None
+        self.ws = None
+        self._http: Optional[aiohttp.ClientSession] = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    # ---- HTTP ----
 
     async def start_session(self, name: str, mood: str = None, **kwargs):
         """Start a new wellness session."""
-        async with aiohttp.ClientSession() as session:
-            payload = {
-                "name": name,
-                "mood": mood,
-                **kwargs
-            }
+        payload = {
+            "name": name,
+            "mood": mood,
+            **kwargs
+        }
 
-            async with session.post(f"{self.base_url}/start-session", json=payload) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    self.session_id = data["session_id"]
-                    print(f"✅ Session started: {self.session_id}")
-                    return data
-                else:
-                    raise Exception(f"Failed to start session: {resp.status}")
+        async with self._session().post(f"{self.base_url}/start-session", json=payload) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                self.session_id = data["session_id"]
+                print(f"✅ Session started: {self.session_id}")
+                return data
+            else:
+                raise Exception(f"Failed to start session: {resp.status}")
 
     async def check_status(self):
         """Check if the session has ended."""
         if not self.session_id:
             raise Exception("No active session")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.base_url}/session/{self.session_id}/status") as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                else:
-                    raise Exception(f"Failed to check status: {resp.status}")
+        async with self._session().get(f"{self.base_url}/session/{self.session_id}/status") as resp:
+            if resp.status == 200:
+                return await resp.json()
+            else:
+                raise Exception(f"Failed to check status: {resp.status}")
 
-    async def wait_for_session_end(self, poll_interval: float = 2.0):
+    async def wait_via_long_poll(self):
         """
-        Poll the API until the session ends.
-        Returns the final session data when complete.
+        Wait for the session to end with the server's long-poll endpoint.
+        Each GET /result hangs until the session ends or the server's wait cap
+        (under a minute) passes, in which case it answers retry=True and is
+        reissued straight away.
         """
-        print(f"⏳ Waiting for session to end (polling every {poll_interval}s)...")
+        if not self.session_id:
+            raise Exception("No active session")
 
+        # The server answers within its cap; only guard against a dead socket
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=90)
         while True:
-            status = await self.check_status()
-
-            if status["ended"]:
-                print(f"\n✅ Session ended!")
-                print(f"   Reason: {status.get('reason')}")
-                print(f"   Duration: {status.get('duration_seconds', 0):.1f}s")
-                return status
+            async with self._session().get(
+                    f"{self.base_url}/session/{self.session_id}/result",
+                    timeout=timeout
+            ) as resp:
+                if resp.status != 200:
+                    raise Exception(f"Failed to get session result: {resp.status}")
+                data = await resp.json()
 
-            print(f"   Status: {status['status']} (still running...)")
-            await asyncio.sleep(poll_interval)
+            if data.get("ended"):
+                return data
 
     async def end_session(self, reason: str = "client_requested"):
         """Manually end the session."""
         if not self.session_id:
             raise Exception("No active session")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                    f"{self.base_url}/session/{self.session_id}/end",
-                    json={"reason": reason}
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    print(f"✅ Session ended manually: {reason}")
-                    return data
-                else:
-                    raise Exception(f"Failed to end session: {resp.status}")
+        async with self._session().post(
+                f"{self.base_url}/session/{self.session_id}/end",
+                json={"reason": reason}
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                print(f"✅ Session ended manually: {reason}")
+                return data
+            else:
+                raise Exception(f"Failed to end session: {resp.status}")
 
+    # ---- Waiting for the session to end ----
 
-# ============================================================================
-# Example 2: WebSocket Client (Real-time)
-# ============================================================================
+    async def wait(self, **kwargs):
+        """
+        Wait until the session ends, in the way selected by `mode`, and return
+        the final session data (None if the WebSocket closed first). Keyword
+        arguments are passed on to the poll waiter.
+        """
+        if not self.session_id:
+            raise Exception("No active session")
 
-class WebSocketClient:
-    """
-    WebSocket client for real-time session updates.
-    Good for: Interactive applications, dashboards, mobile apps
-    """
+        if self.mode == "poll":
+            return await self._wait_poll(**kwargs)
+        if self.mode == "ws":
+            return await self._wait_ws()
+        return await self._wait_hybrid()
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        self.base_url = base_url
-        self.ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
-        self.session_id: Optional[str] = None
-        self.ws = None
+    async def start_session_and_monitor(self, name: str, mood: str = None, **kwargs):
+        """Start a session and wait until it ends."""
+        await self.start_session(name, mood, **kwargs)
+        return await self.wait()
 
-    async def start_session(self, name: str, mood: str = None, **kwargs):
-        """Start a new wellness session."""
-        async with aiohttp.ClientSession() as session:
-            payload = {
-                "name": name,
-                "mood": mood,
-                **kwargs
-            }
+    async def _wait_poll(self, poll_interval: float = 0.2, max_interval: float = 5.0,
+                         use_long_poll: bool = True):
+        """
+        By default this uses the server-side long poll (wait_via_long_poll).
+        With use_long_poll=False it polls /status instead: the delay starts at
+        poll_interval and grows 1.5x per unchanged status, up to max_interval;
+        any status change drops it back to poll_interval.
+        """
+        if use_long_poll:
+            print("⏳ Waiting for session to end (long poll)...")
+            status = await self.wait_via_long_poll()
+            _print_session_end("✅ Session ended!", status)
+            return status
 
-            async with session.post(f"{self.base_url}/start-session", json=payload) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    self.session_id = data["session_id"]
-                    print(f"✅ Session started: {self.session_id}")
-                    return data
-                else:
-                    raise Exception(f"Failed to start session: {resp.status}")
-
-    async def connect_websocket(self):
-        """Connect to WebSocket for real-time updates."""
-        if not self.session_id:
-            raise Exception("No active session")
+        print(f"⏳ Waiting for session to end (polling every {poll_interval}-{max_interval}s)...")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.ws_connect(
-                    f"{self.ws_url}/ws/session/{self.session_id}"
-            ) as ws:
-                self.ws = ws
-                print(f"🔌 Connected to WebSocket")
+        interval = poll_interval
+        last_status = None
 
-                # Listen for messages
-                async for msg in ws:
-                    if msg.type == aiohttp.WSMsgType.TEXT:
-                        data = json.loads(msg.data)
-                        await self.handle_message(data)
+        while True:
+            status = await self.check_status()
 
-                        # Exit when session ends
-                        if data.get("type") == "session_ended":
-                            print(f"\n✅ Session ended via WebSocket!")
-                            print(f"   Reason: {data.get('reason')}")
-                            print(f"   Duration: {data.get('duration_seconds', 0):.1f}s")
-                            break
+            if status["ended"]:
+                _print_session_end("✅ Session ended!", status)
+                return status
+
+            status_name = status["status"]
+            if status_name != last_status:
+                last_status = status_name
+                interval = poll_interval
+                print(f"   Status: {last_status} (still running...)")
+            else:
+                interval = min(interval * 1.5, max(max_interval, poll_interval))
+
+            await asyncio.sleep(interval)
+
+    async def _wait_ws(self):
+        """Listen on the session WebSocket, printing every update, until it ends."""
+        async with self._session().ws_connect(
+                f"{self.ws_url}/ws/session/{self.session_id}"
+        ) as ws:
+            self.ws = ws
+            print(f"🔌 Connected to WebSocket")
+
+            try:
+                async for msg in ws:
+                    if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                        for data in decode_ws_messages(msg):
+                            # Exit when session ends
+                            if await self.handle_message(data) == "session_ended":
+                                _print_session_end("✅ Session ended via WebSocket!", data)
+                                return data
 
                     elif msg.type == aiohttp.WSMsgType.ERROR:
                         print(f"❌ WebSocket error: {ws.exception()}")
                         break
+            finally:
+                self.ws = None
+
+    async def _wait_hybrid(self):
+        """Listen on the session WebSocket for status updates until it ends."""
+        async with self._session().ws_connect(
+                f"{self.ws_url}/ws/session/{self.session_id}"
+        ) as ws:
+            self.ws = ws
+            print(f"🔌 Connected to WebSocket")
+
+            try:
+                async for msg in ws:
+                    if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                        for data in decode_ws_messages(msg):
+                            msg_type = data.get("type")
+
+                            if msg_type == "session_ended":
+                                _print_session_end("🎉 SESSION ENDED NOTIFICATION RECEIVED!", data, detailed=True)
+                                return data
+
+                            elif msg_type == "session_status_update":
+                                print(f"📊 Status: {data.get('status')}")
+
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        print(f"❌ WebSocket error")
+                        break
+            finally:
+                self.ws = None
 
-    async def handle_message(self, data: dict):
-        """Handle incoming WebSocket messages."""
+    async def handle_message(self, data: dict) -> Optional[str]:
+        """Handle incoming WebSocket messages and return the message type."""
         msg_type = data.get("type")
 
         if msg_type == "connected":
             print(f"✅ WebSocket connected to session: {data.get('session_id')}")
 
         elif msg_type == "session_status_update":
-            print(f"📊 Status update: {data.get('status')} - {data.get('message', '')}")
+            print(f"📊 Status update: {data.get('status')}")
 
         elif msg_type == "session_ended":
             # This is the important one - session has ended!
-            pass  # Handled in connect_websocket
+            pass  # Handled in _wait_ws
 
         else:
             print(f"📨 Received: {msg_type}")
 
+        return msg_type
+
     async def send_end_request(self):
-        """Request session end via WebSocket."""
+        """Request session end via the open WebSocket."""
         if self.ws:
             await self.ws.send_str("end_session")
             print("📤 Sent end session request")
 
 
-# ============================================================================
-# Example 3: Hybrid Client (Best of both worlds)
-# ============================================================================
-
-class HybridClient:
-    """
-    Combines HTTP and WebSocket approaches.
-    Starts session via HTTP, gets updates via WebSocket, can end via either.
-    """
-
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        self.base_url = base_url
-        self.ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
-        self.session_id: Optional[str] = None
-
-    async def start_session_and_monitor(self, name: str, mood: str = None, **kwargs):
-        """Start session and monitor via WebSocket until it ends."""
-
-        # 1. Start session via HTTP
-        async with aiohttp.ClientSession() as http_session:
-            payload = {
-                "name": name,
-                "mood": mood,
-                **kwargs
-            }
-
-            async with http_session.post(f"{self.base_url}/start-session", json=payload) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    self.session_id = data["session_id"]
-                    print(f"✅ Session started: {self.session_id}")
-                else:
-                    raise Exception(f"Failed to start session: {resp.status}")
-
-        # 2. Connect to WebSocket for real-time updates
-        async with aiohttp.ClientSession() as ws_session:
-            async with ws_session.ws_connect(
-                    f"{self.ws_url}/ws/session/{self.session_id}"
-            ) as ws:
-                print(f"🔌 Connected to WebSocket")
-
-                async for msg in ws:
-                    if msg.type == aiohttp.WSMsgType.TEXT:
-                        data = json.loads(msg.data)
-                        msg_type = data.get("type")
-
-                        if msg_type == "session_ended":
-                            print(f"\n🎉 SESSION ENDED NOTIFICATION RECEIVED!")
-                            print(f"{'=' * 60}")
-                            print(f"   Reason: {data.get('reason')}")
-                            print(f"   Duration: {data.get('duration_seconds', 0):.1f}s")
-                            print(f"   Ended at: {data.get('timestamp')}")
-                            print(f"{'=' * 60}")
-                            return data
-
-                        elif msg_type == "session_status_update":
-                            print(f"📊 {data.get('message', 'Status update')}")
-
-                    elif msg.type == aiohttp.WSMsgType.ERROR:
-                        print(f"❌ WebSocket error")
-                        break
-
-
 # ============================================================================
 # Usage Examples
 # ============================================================================
@@ -247,21 +306,20 @@ async def example_polling():
     print("EXAMPLE 1: HTTP Polling Client")
     print("=" * 60 + "\n")
 
-    client = PollingClient()
-
-    # Start session
-    await client.start_session(
-        name="Alice",
-        mood="feeling a bit tired",
-        health={
-            "steps_today": 3000,
-            "sleep_hours_last_night": 6.5
-        }
-    )
+    async with WellnessClient(mode="poll") as client:
+        # Start session
+        await client.start_session(
+            name="Alice",
+            mood="feeling a bit tired",
+            health={
+                "steps_today": 3000,
+                "sleep_hours_last_night": 6.5
+            }
+        )
 
-    # Poll until session ends
-    final_status = await client.wait_for_session_end(poll_interval=3.0)
-    print(f"\n✅ Final status: {final_status}")
+        # Poll until session ends
+        final_status = await client.wait()
+        print(f"\n✅ Final status: {final_status}")
 
 
 async def example_websocket():
@@ -270,16 +328,15 @@ async def example_websocket():
     print("EXAMPLE 2: WebSocket Client (Real-time)")
     print("=" * 60 + "\n")
 
-    client = WebSocketClient()
-
-    # Start session
-    await client.start_session(
-        name="Bob",
-        mood="stressed about work"
-    )
+    async with WellnessClient(mode="ws") as client:
+        # Start session
+        await client.start_session(
+            name="Bob",
+            mood="stressed about work"
+        )
 
-    # Connect and listen for updates
-    await client.connect_websocket()
+        # Connect and listen for updates
+        await client.wait()
 
 
 async def example_hybrid():
@@ -288,16 +345,15 @@ async def example_hybrid():
     print("EXAMPLE 3: Hybrid Client (Recommended)")
     print("=" * 60 + "\n")
 
-    client = HybridClient()
+    async with WellnessClient(mode="hybrid") as client:
+        # Start and monitor in one go
+        result = await client.start_session_and_monitor(
+            name="Charlie",
+            mood="anxious",
+            goals="improve sleep and reduce stress"
+        )
 
-    # Start and monitor in one go
-    result = await client.start_session_and_monitor(
-        name="Charlie",
-        mood="anxious",
-        goals="improve sleep and reduce stress"
-    )
-
-    print(f"\n✅ Session completed: {result}")
+        print(f"\n✅ Session completed: {result}")
 
 
 async def example_manual_end():
@@ -306,17 +362,16 @@ async def example_manual_end():
     print("EXAMPLE 4: Manual Session End")
     print("=" * 60 + "\n")
 
-    client = PollingClient()
-
-    # Start session
-    await client.start_session(name="Dana", mood="good")
+    async with WellnessClient(mode="poll") as client:
+        # Start session
+        await client.start_session(name="Dana", mood="good")
 
-    # Wait a bit
-    print("Waiting 10 seconds before ending session...")
-    await asyncio.sleep(10)
+        # Wait a bit
+        print("Waiting 10 seconds before ending session...")
+        await asyncio.sleep(10)
 
-    # Manually end it
-    await client.end_session("testing_manual_end")
+        # Manually end it
+        await client.end_session("testing_manual_end")
 
 
 # ============================================================================
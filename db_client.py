@@ -1,7 +1,9 @@
 # db_client.py
 
+import asyncio
 import os
 import sqlite3
+import threading
 from typing import List, Dict, Any, Optional
 
 from dotenv import load_dotenv
@@ -11,6 +13,18 @@ load_dotenv()
 # Path to your SQLite DB file (override via .env if needed)
 DB_PATH = os.getenv("SOCIAL_EVENTS_DB_PATH", "social_events.db")
 
+# Upper bound on how much of the DB file each connection memory-maps
+MMAP_SIZE_BYTES = 64 * 1024 * 1024
+
+# Lookup statements are fixed strings, so sqlite3's per-connection statement
+# cache parses each one only once. Columns are listed explicitly (the
+# social_events schema from setup_database.py) rather than SELECT *.
+_SQL_EVENT_COLUMNS = "id, event_name, date, location, interest_tag, description, created_at"
+_SQL_EVENTS_BY_NAME = f"SELECT {_SQL_EVENT_COLUMNS} FROM social_events WHERE event_name LIKE ?"
+
+# One connection per thread, opened lazily and reused across calls
+_local = threading.local()
+
 
 class DatabaseError(Exception):
     """Custom exception for database-related errors."""
@@ -19,40 +33,70 @@ class DatabaseError(Exception):
 
 def get_db_connection() -> sqlite3.Connection:
     """
-    Open a new SQLite connection with Row factory so we can get dict-like rows.
+    Return this thread's pooled SQLite connection (WAL mode, Row factory so we
+    can get dict-like rows), opening it on first use.
     """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
         conn.row_factory = sqlite3.Row
-        return conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Sorts/temp tables stay in RAM, and reads go through a memory map
+        # instead of a read() syscall per page
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+        _ensure_indexes(conn)
     except sqlite3.Error as e:
         raise DatabaseError(f"Error connecting to database: {e}") from e
 
+    _local.conn = conn
+    return conn
 
-def fetch_social_events_by_name(event_name: str) -> List[Dict[str, Any]]:
-    """
-    Return all rows from the `social_events` table that match the given event_name.
 
-    You can switch between exact match and partial match by changing the SQL.
+def _ensure_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Create the case-insensitive event_name index used by name lookups.
+    Skipped quietly if the social_events table does not exist yet.
     """
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_social_events_name_nocase "
+            "ON social_events(event_name COLLATE NOCASE)"
+        )
+        conn.commit()
+    except sqlite3.OperationalError:
+        pass
 
-        # OPTION A: exact match
-        # sql = "SELECT * FROM social_events WHERE event_name = ?"
-        # params = (event_name,)
 
-        # OPTION B: partial match (e.g. "%yoga%" will find "Evening Yoga Meetup")
-        sql = "SELECT * FROM social_events WHERE event_name LIKE ?"
-        params = (f"%{event_name}%",)
+def fetch_social_events_by_name(event_name: str, substring: bool = False) -> List[Dict[str, Any]]:
+    """
+    Return all rows from the `social_events` table whose event_name starts with
+    the given text (case-insensitive). With substring=True the text may appear
+    anywhere, e.g. "yoga" also finds "Evening Yoga Meetup"; that needs a
+    leading % in the pattern, which defeats the event_name index and scans the
+    whole table.
 
-        cur.execute(sql, params)
-        rows = cur.fetchall()
+    Not cached here; the API keeps recent results in its short-lived TTL cache.
+    """
+    conn = get_db_connection()
+    try:
+        # A prefix pattern is answered from idx_social_events_name_nocase
+        pattern = f"%{event_name}%" if substring else f"{event_name}%"
+        rows = conn.execute(_SQL_EVENTS_BY_NAME, (pattern,)).fetchall()
 
         # Convert sqlite3.Row → dict
         return [dict(row) for row in rows]
     except sqlite3.Error as e:
         raise DatabaseError(f"Error querying social_events: {e}") from e
-    finally:
-        conn.close()
+
+
+async def fetch_social_events_by_name_async(event_name: str, substring: bool = False) -> List[Dict[str, Any]]:
+    """
+    Awaitable variant of `fetch_social_events_by_name` for async callers.
+    The query runs in a worker thread so it never blocks the event loop.
+    """
+    return await asyncio.to_thread(fetch_social_events_by_name, event_name, substring)
@@ -2,24 +2,63 @@ import os
 from typing import List, Optional
 import httpx
 from dotenv import load_dotenv
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to httpx's stdlib decoding
+    orjson = None
 load_dotenv()
 
 
 
 TICKETMASTER_API_KEY = os.getenv("TICKETMASTER_API_KEY")
 
+# Shared client for callers that do not pass their own, created on first use
+_default_client: Optional[httpx.AsyncClient] = None
+
 
 class TicketmasterError(Exception):
     """Custom exception for Ticketmaster-related errors."""
     pass
 
 
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Build the long-lived client the API shares across Ticketmaster requests,
+    so repeat calls reuse pooled keep-alive connections instead of paying a
+    new TLS handshake each time.
+    """
+    return httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+
+def get_default_http_client() -> httpx.AsyncClient:
+    """
+    Return the module's shared client, (re)creating it if it is missing or
+    closed. Like any AsyncClient it belongs to the event loop that first uses it.
+    """
+    global _default_client
+    if _default_client is None or _default_client.is_closed:
+        _default_client = create_http_client()
+    return _default_client
+
+
+async def close_default_http_client() -> None:
+    """Close the shared client, e.g. on shutdown; the next call opens a new one."""
+    global _default_client
+    if _default_client is not None:
+        await _default_client.aclose()
+        _default_client = None
+
+
 async def fetch_ticketmaster_events(
     lat: float,
     lon: float,
     radius_km: float = 20.0,
     keyword: Optional[str] = None,
     size: int = 20,
+    client: Optional[httpx.AsyncClient] = None,
 ) -> List[dict]:
     """
     Call Ticketmaster Discovery API and return a normalized list of events.
@@ -30,6 +69,7 @@ async def fetch_ticketmaster_events(
         radius_km: Search radius in kilometers.
         keyword: Optional keyword to filter events (e.g. "social", "music").
         size: Maximum number of events to fetch.
+        client: Optional client; the module's shared client is used when omitted.
 
     Returns:
         List of dicts, each representing a simplified event.
@@ -58,35 +98,38 @@ async def fetch_ticketmaster_events(
     if keyword:
         params["keyword"] = keyword
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(base_url, params=params)
-        try:
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            raise TicketmasterError(
-                f"Ticketmaster API error: {e.response.status_code} {e.response.text}"
-            ) from e
+    if client is None:
+        client = get_default_http_client()
+    resp = await client.get(base_url, params=params)
+
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise TicketmasterError(
+            f"Ticketmaster API error: {e.response.status_code} {e.response.text}"
+        ) from e
 
-        data = resp.json()
+    data = orjson.loads(resp.content) if orjson else resp.json()
 
-    events_raw = data.get("_embedded", {}).get("events", [])
+    events_raw = (data.get("_embedded") or {}).get("events") or ()
     events: List[dict] = []
+    append = events.append
 
+    # Bind each nested object once; missing or null parts become {} so the
+    # field lookups below never need their own defaults
     for ev in events_raw:
-        venues = ev.get("_embedded", {}).get("venues") or [{}]
-        venue = venues[0]
-
-        classifications = ev.get("classifications") or [{}]
-        classification = classifications[0]
+        start = (ev.get("dates") or {}).get("start") or {}
+        venue = ((ev.get("_embedded") or {}).get("venues") or (None,))[0] or {}
+        classification = (ev.get("classifications") or (None,))[0] or {}
 
-        events.append(
+        append(
             {
                 "id": ev.get("id"),
                 "name": ev.get("name"),
                 "url": ev.get("url"),
-                "start_date_time": ev.get("dates", {}).get("start", {}).get("dateTime"),
-                "local_date": ev.get("dates", {}).get("start", {}).get("localDate"),
-                "local_time": ev.get("dates", {}).get("start", {}).get("localTime"),
+                "start_date_time": start.get("dateTime"),
+                "local_date": start.get("localDate"),
+                "local_time": start.get("localTime"),
                 "venue_name": venue.get("name"),
                 "city": (venue.get("city") or {}).get("name"),
                 "country": (venue.get("country") or {}).get("name"),
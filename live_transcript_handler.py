@@ -12,9 +12,12 @@ from datetime import datetime
 import traceback
 from collections import deque
 
-from agents import SentimentAgent, SocialAgent, HealthAgent, AgentState
+from agents import SENTIMENT_AGENT, SOCIAL_AGENT, HEALTH_AGENT, AgentState
 from langchain_core.messages import HumanMessage, SystemMessage
 
+# Analysis runs at least this often while the coordinator is running
+ANALYSIS_INTERVAL_SECONDS = 30
+
 
 @dataclass
 class TranscriptSegment:
@@ -77,10 +80,10 @@ class LiveAgentCoordinator:
         self.user_name = user_name
         self.initial_context = initial_context
 
-        # Initialize agents
-        self.sentiment_agent = SentimentAgent()
-        self.social_agent = SocialAgent()
-        self.health_agent = HealthAgent()
+        # Shared, stateless agent instances
+        self.sentiment_agent = SENTIMENT_AGENT
+        self.social_agent = SOCIAL_AGENT
+        self.health_agent = HEALTH_AGENT
 
         # Transcript management
         self.transcript_buffer = TranscriptBuffer()
@@ -96,14 +99,16 @@ class LiveAgentCoordinator:
         # Control flags
         self._running = False
         self._analysis_task: Optional[asyncio.Task] = None
+        # Set to request an analysis; requests made while one runs are coalesced
+        self._analysis_requested = asyncio.Event()
 
     async def start(self, on_analysis_complete: Optional[Callable] = None):
         """Start the live coordinator."""
         self._running = True
         self.on_analysis_complete = on_analysis_complete
 
-        # Start periodic analysis task
-        self._analysis_task = asyncio.create_task(self._periodic_analysis_loop())
+        # Start the analysis worker
+        self._analysis_task = asyncio.create_task(self._analysis_loop())
         print("🔄 Live Agent Coordinator started")
 
     async def stop(self):
@@ -133,13 +138,21 @@ class LiveAgentCoordinator:
         # Trigger immediate analysis if this is a user utterance
         if speaker == "user" and len(text.split()) > 5:
             print(f"🔔 Triggering immediate analysis (user spoke {len(text.split())} words)")
-            asyncio.create_task(self._analyze_now())
-
-    async def _periodic_analysis_loop(self):
-        """Runs periodic analysis every 30 seconds."""
+            self._analysis_requested.set()
+
+    async def _analysis_loop(self):
+        """
+        The only caller of _analyze_now, so at most one analysis is in flight.
+        Runs when an analysis is requested, or after ANALYSIS_INTERVAL_SECONDS
+        without one.
+        """
         try:
             while self._running:
-                await asyncio.sleep(30)
+                try:
+                    await asyncio.wait_for(self._analysis_requested.wait(), ANALYSIS_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._analysis_requested.clear()
                 if self._running:
                     await self._analyze_now()
         except asyncio.CancelledError:
@@ -162,7 +175,7 @@ class LiveAgentCoordinator:
             print(f"📝 Analyzing recent text: '{recent_text[:100]}...'")
             print(f"{'─' * 60}\n")
 
-            # Build agent state
+            # Built once; the per-agent states below only swap in their own messages
             state = AgentState(
                 messages=[],
                 user_name=self.user_name,
@@ -182,13 +195,11 @@ class LiveAgentCoordinator:
             print("   👥 Social Agent finding suggestions...")
             print("   💪 Health Agent evaluating wellness...\n")
 
-            sentiment_task = asyncio.create_task(self._analyze_sentiment(state, recent_text))
-            social_task = asyncio.create_task(self._analyze_social(state, recent_text))
-            health_task = asyncio.create_task(self._analyze_health(state))
-
             # Wait for all analyses
             sentiment_result, social_result, health_result = await asyncio.gather(
-                sentiment_task, social_task, health_task,
+                self._analyze_sentiment(state, recent_text),
+                self._analyze_social(state, recent_text),
+                self._analyze_health(state),
                 return_exceptions=True
             )
 
@@ -236,18 +247,10 @@ class LiveAgentCoordinator:
         try:
             print("   🎭 [Sentiment Agent] Starting mood analysis...")
             # Create a focused state for sentiment
-            sentiment_state = AgentState(
-                messages=[HumanMessage(content=f"Analyze the mood in this text: '{recent_text}'")],
-                user_name=state['user_name'],
-                initial_mood=recent_text,
-                initial_health_data=state['initial_health_data'],
-                mood_score=5,
-                mood_analysis="",
-                social_suggestion="",
-                health_score=50,
-                health_suggestion="",
-                final_context_prompt=""
-            )
+            sentiment_state = {
+                **state,
+                "messages": [HumanMessage(content=f"Analyze the mood in this text: '{recent_text}'")],
+            }
 
             result = await self.sentiment_agent(sentiment_state)
 
@@ -266,19 +269,11 @@ class LiveAgentCoordinator:
         """Run social suggestion analysis."""
         try:
             print("   👥 [Social Agent] Finding social activities...")
-            social_state = AgentState(
-                messages=[HumanMessage(
+            social_state = {
+                **state,
+                "messages": [HumanMessage(
                     content=f"Based on this conversation: '{recent_text}', suggest relevant social activities.")],
-                user_name=state['user_name'],
-                initial_mood=recent_text,
-                initial_health_data=state['initial_health_data'],
-                mood_score=5,
-                mood_analysis="",
-                social_suggestion="",
-                health_score=50,
-                health_suggestion="",
-                final_context_prompt=""
-            )
+            }
 
             result = await self.social_agent(social_state)
             suggestion_preview = result.get('social_suggestion', '')[:50]
@@ -7,6 +7,11 @@ Replaces server-side PyAudio with client-side audio streaming.
 import asyncio
 import json
 import base64
+import logging
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
 from typing import Optional, Dict, Set
 from datetime import datetime
 from google import genai
@@ -15,20 +20,56 @@ import os
 
 from live_transcript_handler import LiveAgentCoordinator, LiveAnalysisResult
 
+# Child of the "api" logger, so records go through its queue handler and level
+log = logging.getLogger("api.mobile_audio")
+
+
+def encode_message(message: dict) -> str:
+    """
+    Encode a message for the mobile audio socket. The mobile protocol uses
+    text frames, so this returns str; orjson is used when it is installed.
+    """
+    if orjson:
+        return orjson.dumps(message).decode("utf-8")
+    return json.dumps(message, default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o))
+
+
+_AUDIO_FRAME_PREFIX = '{"type":"audio","data":"'
+
+# Binary audio frames: one opcode byte followed by raw PCM. Clients that send
+# "binary_audio": true in start_audio_session get model audio this way instead
+# of base64 inside JSON; control messages stay JSON text either way.
+CLIENT_AUDIO_OPCODE = 0x01
+SERVER_AUDIO_OPCODE = b"\x02"
+
+CLIENT_AUDIO_MIME_TYPE = "audio/pcm;rate=16000"  # Adjust based on client format
+
+# Every mobile session speaks with the same voice, so this part of the live
+# config is built once and shared; only the system prompt differs per session
+_SPEECH_CONFIG = types.SpeechConfig(
+    voice_config=types.VoiceConfig(
+        prebuilt_voice_config=types.PrebuiltVoiceConfig(
+            voice_name="Zephyr"
+        )
+    )
+)
+
 
 class MobileAudioSession:
     """Manages a single mobile audio session with Gemini Live API."""
 
-    def __init__(self, session_id: str, user_context: dict, api_key: str):
+    def __init__(self, session_id: str, user_context: dict, api_key: str, binary_audio: bool = False):
         self.session_id = session_id
         self.user_context = user_context
         self.api_key = api_key
+        self.binary_audio = binary_audio
         self.client = genai.Client(api_key=api_key, http_options={"api_version": "v1alpha"})
         self.model_id = os.environ.get("MODEL", "gemini-2.0-flash-exp")
 
         # Session state
         self.is_active = False
         self.should_end = False
+        self.closed_event = asyncio.Event()
         self.end_session_requested = False
         self.gemini_session = None
 
@@ -73,13 +114,7 @@ class MobileAudioSession:
         # Configure Gemini Live
         config = types.LiveConnectConfig(
             response_modalities=["AUDIO"],
-            speech_config=types.SpeechConfig(
-                voice_config=types.VoiceConfig(
-                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                        voice_name="Zephyr"
-                    )
-                )
-            ),
+            speech_config=_SPEECH_CONFIG,
             system_instruction=initial_system_prompt,
             tools=[self._end_session_tool],
         )
@@ -104,7 +139,7 @@ class MobileAudioSession:
         self.gemini_receive_task = asyncio.create_task(self._receive_from_gemini())
         self.context_injection_task = asyncio.create_task(self._context_injection_loop())
 
-        print(f"[Session {self.session_id}] Started successfully")
+        log.info("[Session %s] Started successfully", self.session_id)
 
     def _end_session_tool(self):
         """Tool for Gemini to end the session."""
@@ -120,11 +155,11 @@ class MobileAudioSession:
             await self.gemini_session.send_realtime_input(
                 audio=types.Blob(
                     data=audio_data,
-                    mime_type="audio/pcm;rate=16000"  # Adjust based on client format
+                    mime_type=CLIENT_AUDIO_MIME_TYPE
                 )
             )
         except Exception as e:
-            print(f"[Session {self.session_id}] Error processing audio: {e}")
+            log.warning("[Session %s] Error processing audio: %s", self.session_id, e)
             await self.send_to_client({
                 "type": "error",
                 "message": f"Audio processing error: {str(e)}"
@@ -154,12 +189,12 @@ class MobileAudioSession:
 
                         # Check if session should end after turn completes
                         if self.end_session_requested:
-                            print(f"[Session {self.session_id}] Ending after final response")
+                            log.info("[Session %s] Ending after final response", self.session_id)
                             await asyncio.sleep(1.0)  # Give client time to play audio
                             await self.end_session("ai_initiated")
 
         except Exception as e:
-            print(f"[Session {self.session_id}] Error in Gemini receive: {e}")
+            log.warning("[Session %s] Error in Gemini receive: %s", self.session_id, e)
             await self.send_to_client({
                 "type": "error",
                 "message": f"Gemini error: {str(e)}"
@@ -173,7 +208,7 @@ class MobileAudioSession:
                 function_id = getattr(fc, 'id', None)
 
                 if function_name == 'end_session_tool':
-                    print(f"[Session {self.session_id}] End session tool called")
+                    log.info("[Session %s] End session tool called", self.session_id)
                     self.end_session_requested = True
 
                     # Send tool response back to Gemini
@@ -207,13 +242,16 @@ class MobileAudioSession:
             if hasattr(part, 'text') and part.text:
                 text_parts.append(part.text)
 
-        # Send audio to client
+        # Send the turn's audio to the client as one frame (PCM parts simply
+        # concatenate), raw if it asked for binary frames. Otherwise the base64
+        # (which never needs JSON escaping) is spliced into a pre-encoded
+        # template instead of going through a dict.
         if audio_chunks:
-            for chunk in audio_chunks:
-                await self.send_to_client({
-                    "type": "audio",
-                    "data": base64.b64encode(chunk).decode('utf-8')
-                })
+            if self.binary_audio:
+                await self._send_bytes(b"".join([SERVER_AUDIO_OPCODE, *audio_chunks]))
+            else:
+                audio = b"".join(audio_chunks)
+                await self._send_text(_AUDIO_FRAME_PREFIX + base64.b64encode(audio).decode('ascii') + '"}')
 
         # Send transcript to client and live coordinator
         if text_parts:
@@ -256,15 +294,27 @@ class MobileAudioSession:
         except asyncio.CancelledError:
             pass
         except Exception as e:
-            print(f"[Session {self.session_id}] Context injection error: {e}")
+            log.warning("[Session %s] Context injection error: %s", self.session_id, e)
 
     async def send_to_client(self, message: dict):
         """Send message to mobile client."""
+        await self._send_text(encode_message(message))
+
+    async def _send_text(self, payload: str):
+        """Send an already-encoded JSON message to the mobile client."""
         if self.websocket:
             try:
-                await self.websocket.send_json(message)
+                await self.websocket.send_text(payload)
             except Exception as e:
-                print(f"[Session {self.session_id}] Error sending to client: {e}")
+                log.warning("[Session %s] Error sending to client: %s", self.session_id, e)
+
+    async def _send_bytes(self, payload: bytes):
+        """Send a binary frame to the mobile client."""
+        if self.websocket:
+            try:
+                await self.websocket.send_bytes(payload)
+            except Exception as e:
+                log.warning("[Session %s] Error sending to client: %s", self.session_id, e)
 
     async def end_session(self, reason: str):
         """End the session gracefully."""
@@ -274,31 +324,35 @@ class MobileAudioSession:
         self.should_end = True
         self.is_active = False
 
-        print(f"[Session {self.session_id}] Ending: {reason}")
+        log.info("[Session %s] Ending: %s", self.session_id, reason)
 
-        # Notify client
-        await self.send_to_client({
-            "type": "session_ended",
-            "reason": reason,
-            "timestamp": datetime.now().isoformat()
-        })
+        try:
+            # Notify client
+            await self.send_to_client({
+                "type": "session_ended",
+                "reason": reason,
+                "timestamp": datetime.now()
+            })
 
-        # Cancel tasks
-        if self.gemini_receive_task:
-            self.gemini_receive_task.cancel()
-        if self.context_injection_task:
-            self.context_injection_task.cancel()
+            # Cancel tasks
+            if self.gemini_receive_task:
+                self.gemini_receive_task.cancel()
+            if self.context_injection_task:
+                self.context_injection_task.cancel()
 
-        # Stop coordinator
-        if self.live_coordinator:
-            await self.live_coordinator.stop()
+            # Stop coordinator
+            if self.live_coordinator:
+                await self.live_coordinator.stop()
 
-        # Close Gemini session
-        if self.gemini_session:
-            try:
-                await self.gemini_session.__aexit__(None, None, None)
-            except Exception as e:
-                print(f"[Session {self.session_id}] Error closing Gemini: {e}")
+            # Close Gemini session
+            if self.gemini_session:
+                try:
+                    await self.gemini_session.__aexit__(None, None, None)
+                except Exception as e:
+                    log.warning("[Session %s] Error closing Gemini: %s", self.session_id, e)
+        finally:
+            # Set last so anyone waiting on closed_event sees a fully torn down session
+            self.closed_event.set()
 
 
 class MobileAudioSessionManager:
@@ -314,14 +368,24 @@ class MobileAudioSessionManager:
             api_key: str,
             websocket,
             initial_system_prompt: str,
-            initial_context: str
+            initial_context: str,
+            binary_audio: bool = False
     ) -> MobileAudioSession:
         """Create and start a new mobile audio session."""
 
-        session = MobileAudioSession(session_id, user_context, api_key)
+        session = MobileAudioSession(session_id, user_context, api_key, binary_audio)
         self.sessions[session_id] = session
 
-        await session.start(websocket, initial_system_prompt, initial_context)
+        try:
+            await session.start(websocket, initial_system_prompt, initial_context)
+        except Exception:
+            # The caller never gets the session, so nothing else would remove it
+            # or stop the live coordinator that start() may already have running
+            self.sessions.pop(session_id, None)
+            session.is_active = False
+            if session.live_coordinator:
+                await session.live_coordinator.stop()
+            raise
 
         return session
 
@@ -331,10 +395,9 @@ class MobileAudioSessionManager:
 
     async def end_session(self, session_id: str, reason: str = "closed"):
         """End a session."""
-        session = self.sessions.get(session_id)
+        session = self.sessions.pop(session_id, None)
         if session:
             await session.end_session(reason)
-            del self.sessions[session_id]
 
     async def cleanup_inactive_sessions(self):
         """Clean up inactive sessions."""
@@ -13,7 +13,13 @@ DB_FILE = "user_data.db"
 def setup_database():
     """Creates the database tables and populates with sample data."""
     conn = sqlite3.connect(DB_FILE)
+    # WAL persists in the file and matches the runtime connections; skipping
+    # fsync is only set on this short-lived setup connection
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
     cursor = conn.cursor()
+    # Everything below runs in one explicit transaction, committed at the end
+    cursor.execute("BEGIN")
 
     # ---------------------------
     # Core tables
@@ -42,6 +48,28 @@ def setup_database():
         )
     """)
 
+    # ---------------------------
+    # Covering indexes for the agent tool queries
+    # ---------------------------
+
+    # get_user_interests: lookup by name answered from the index alone
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_interests_name
+        ON user_interests(user_name, interests)
+    """)
+
+    # find_social_events: seek on tag, range-scan on date, no table lookup
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_social_events_tag_date_cov
+        ON social_events(interest_tag, date, event_name, location)
+    """)
+
+    # fetch_social_events_by_name: case-insensitive prefix LIKE on the name
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_social_events_name_nocase
+        ON social_events(event_name COLLATE NOCASE)
+    """)
+
     # Create conversations table (optional, for history)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS conversations (
@@ -116,12 +144,11 @@ def setup_database():
          "Community Center", "wellness", "Learn stress management techniques"),
     ]
 
-    for event in events:
-        cursor.execute("""
-            INSERT OR IGNORE INTO social_events 
-            (event_name, date, location, interest_tag, description)
-            VALUES (?, ?, ?, ?, ?)
-        """, event)
+    cursor.executemany("""
+        INSERT OR IGNORE INTO social_events
+        (event_name, date, location, interest_tag, description)
+        VALUES (?, ?, ?, ?, ?)
+    """, events)
 
     # ---------------------------
     # NEW: Insert dummy wellness_questionnaire + apple_health_daily
@@ -153,16 +180,15 @@ def setup_database():
     cursor.execute("DELETE FROM wellness_questionnaire WHERE user_id = ?", ("sagar",))
     cursor.execute("DELETE FROM apple_health_daily WHERE user_id = ?", ("sagar",))
 
-    for date_dt, mood, stress, energy, sleep_q, social, note in questionnaire_rows:
-        entry_date = date_dt.strftime("%Y-%m-%d")
-        cursor.execute("""
-            INSERT INTO wellness_questionnaire
-            (user_id, entry_date, mood_rating, stress_rating, energy_level,
-             sleep_quality, social_interactions, free_text_note, sentiment_score, wellness_score)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    cursor.executemany("""
+        INSERT INTO wellness_questionnaire
+        (user_id, entry_date, mood_rating, stress_rating, energy_level,
+         sleep_quality, social_interactions, free_text_note, sentiment_score, wellness_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (
             "sagar",
-            entry_date,
+            date_dt.strftime("%Y-%m-%d"),
             mood,
             stress,
             energy,
@@ -171,7 +197,9 @@ def setup_database():
             note,
             None,   # sentiment_score to be filled later by analysis
             None    # wellness_score to be computed later
-        ))
+        )
+        for date_dt, mood, stress, energy, sleep_q, social, note in questionnaire_rows
+    ])
 
     # Dummy Apple Health aggregates aligned to same 7 days
     health_rows = [
@@ -185,25 +213,20 @@ def setup_database():
         (days[6],  8000, 500.0, 7.0, 11.0, 63.0,  8.0),
     ]
 
-    for date_dt, steps, kcal, sleep_h, stand_h, hr, mindful_min in health_rows:
-        date_str = date_dt.strftime("%Y-%m-%d")
-        cursor.execute("""
-            INSERT INTO apple_health_daily
-            (user_id, date, steps, active_energy_kcal, sleep_hours,
-             stand_hours, resting_hr, mindfulness_minutes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            "sagar",
-            date_str,
-            steps,
-            kcal,
-            sleep_h,
-            stand_h,
-            hr,
-            mindful_min
-        ))
+    cursor.executemany("""
+        INSERT INTO apple_health_daily
+        (user_id, date, steps, active_energy_kcal, sleep_hours,
+         stand_hours, resting_hr, mindfulness_minutes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        ("sagar", date_dt.strftime("%Y-%m-%d"), steps, kcal, sleep_h, stand_h, hr, mindful_min)
+        for date_dt, steps, kcal, sleep_h, stand_h, hr, mindful_min in health_rows
+    ])
 
     conn.commit()
+
+    # Refresh planner statistics so the covering indexes get picked
+    cursor.execute("ANALYZE")
     conn.close()
 
     print("✓ Database setup complete!")
@@ -12,42 +12,48 @@ import asyncio
 
 # Import agent and state components
 from agents import (
-    SentimentAgent,
-    SocialAgent,
-    HealthAgent,
+    SENTIMENT_AGENT,
+    SOCIAL_AGENT,
+    HEALTH_AGENT,
     AgentState,
     generate_final_prompt
 )
 
 # Import the enhanced WellnessAgent
-from welness_agent_live import UserContext, WellnessAgentLive, WELLNESS_SYSTEM_PROMPT
+from welness_agent_live import UserContext, HealthSnapshot, WellnessAgentLive, WELLNESS_SYSTEM_PROMPT
 
-# Initialize agent instances
-sentiment_agent = SentimentAgent()
-social_agent = SocialAgent()
-health_agent = HealthAgent()
+
+async def parallel_analysis(state: AgentState) -> dict:
+    """
+    Runs the sentiment, social and health agents concurrently on the same
+    initial state and merges their updates into a single state update.
+    """
+    results = await asyncio.gather(
+        SENTIMENT_AGENT(state),
+        SOCIAL_AGENT(state),
+        HEALTH_AGENT(state),
+    )
+
+    update = {"messages": []}
+    for result in results:
+        result = dict(result)
+        update["messages"] += result.pop("messages", [])
+        update.update(result)
+
+    return update
 
 
 def build_graph():
     """Builds and compiles the LangGraph multi-agent orchestration."""
     builder = StateGraph(AgentState)
 
-    # Add nodes
-    builder.add_node("sentiment_analysis", sentiment_agent.__call__)
-    builder.add_node("social_suggestion", social_agent.__call__)
-    builder.add_node("health_analysis", health_agent.__call__)
+    # Add nodes - the three analysis agents share one fan-out node
+    builder.add_node("parallel_analysis", parallel_analysis)
     builder.add_node("final_context_generation", generate_final_prompt)
 
-    # Define edges - parallel execution
-    builder.add_edge(START, "sentiment_analysis")
-    builder.add_edge(START, "social_suggestion")
-    builder.add_edge(START, "health_analysis")
-
     # All agents complete before final generation
-    builder.add_edge("sentiment_analysis", "final_context_generation")
-    builder.add_edge("social_suggestion", "final_context_generation")
-    builder.add_edge("health_analysis", "final_context_generation")
-
+    builder.add_edge(START, "parallel_analysis")
+    builder.add_edge("parallel_analysis", "final_context_generation")
     builder.add_edge("final_context_generation", END)
 
     print("✓ Compiling LangGraph orchestration...")
@@ -59,7 +65,7 @@ def build_graph():
 app = build_graph()
 
 
-async def run_orchestration_with_live_agents(user_context: UserContext, on_session_end=None):
+async def run_orchestration_with_live_agents(user_context: UserContext, on_session_end=None, on_event=None):
     """
     Runs the initial multi-agent orchestration, then starts a voice session
     with continuous live agent analysis and real-time suggestions.
@@ -67,6 +73,7 @@ async def run_orchestration_with_live_agents(user_context: UserContext, on_sessi
     Args:
         user_context: User context information
         on_session_end: Optional async callback function(reason: str) called when voice session ends
+        on_event: Optional async callback function(event: dict) called with intermediate results
     """
 
     # 1. Prepare initial state for upfront analysis
@@ -106,6 +113,16 @@ async def run_orchestration_with_live_agents(user_context: UserContext, on_sessi
         print(f"Social Suggestion: {final_state.get('social_suggestion', 'N/A')[:80]}...")
         print(f"{'=' * 60}\n")
 
+        if on_event:
+            await on_event({
+                "event": "initial_analysis",
+                "mood_score": final_state.get('mood_score'),
+                "mood_analysis": final_state.get('mood_analysis'),
+                "health_score": final_state.get('health_score'),
+                "health_suggestion": final_state.get('health_suggestion'),
+                "social_suggestion": final_state.get('social_suggestion'),
+            })
+
     except Exception as e:
         print(f"\n❌ ERROR: Initial LangGraph orchestration failed: {e}")
         traceback.print_exc()
@@ -145,11 +162,15 @@ async def run_orchestration_with_live_agents(user_context: UserContext, on_sessi
     # Instantiate the LIVE wellness agent
     wellness_agent = WellnessAgentLive(api_key=api_key)
 
+    if on_event:
+        await on_event({"event": "voice_session_starting"})
+
     try:
         await wellness_agent.start_voice_session_with_live_agents(
             user_context=user_context,
             initial_history=full_initial_history,
-            on_session_end=on_session_end
+            on_session_end=on_session_end,
+            on_event=on_event
         )
     except Exception as e:
         print(f"\n❌ ERROR: Voice session failed: {e}")
@@ -161,20 +182,18 @@ async def run_orchestration_with_live_agents(user_context: UserContext, on_sessi
 
 
 # Alias for backward compatibility
-async def run_orchestration(user_context: UserContext, on_session_end=None):
+async def run_orchestration(user_context: UserContext, on_session_end=None, on_event=None):
     """Alias for the live orchestration function."""
-    await run_orchestration_with_live_agents(user_context, on_session_end)
+    await run_orchestration_with_live_agents(user_context, on_session_end, on_event)
 
 
-async def run_orchestration_with_callback(user_context: UserContext, on_session_end=None):
+async def run_orchestration_with_callback(user_context: UserContext, on_session_end=None, on_event=None):
     """Alias for backward compatibility with callback support."""
-    await run_orchestration_with_live_agents(user_context, on_session_end)
+    await run_orchestration_with_live_agents(user_context, on_session_end, on_event)
 
 
 async def main():
     """For testing the orchestrator directly."""
-    from welness_agent_live import HealthSnapshot
-
     # Test context
     ctx = UserContext(
         name="Sagar",
@@ -193,7 +212,15 @@ async def main():
 if __name__ == "__main__":
     import sys
 
-    if sys.platform == 'win32':
+    # uvloop is optional (and unavailable on Windows); fall back to asyncio
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    elif sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
     try:
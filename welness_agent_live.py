@@ -1,4 +1,5 @@
 import asyncio
+import collections
 import pyaudio
 import os
 import sys
@@ -7,7 +8,7 @@ from google import genai
 from google.genai import types
 from websockets.exceptions import ConnectionClosedError
 from typing import Dict, List, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 
 from live_transcript_handler import LiveAgentCoordinator, LiveAnalysisResult
 
@@ -49,6 +50,21 @@ Session Management:
 - Do not try to extend the conversation once the user has indicated they want to leave.
 """
 
+# Live configs that do not depend on the user are built once and shared by
+# reference; treat them as read-only
+_VOICE_SPEECH_CONFIG = types.SpeechConfig(
+    voice_config=types.VoiceConfig(
+        prebuilt_voice_config=types.PrebuiltVoiceConfig(
+            voice_name="Zephyr"
+        )
+    )
+)
+
+_CHAT_CONFIG = types.LiveConnectConfig(
+    response_modalities=["TEXT"],
+    system_instruction=WELLNESS_SYSTEM_PROMPT,
+)
+
 
 @dataclass
 class HealthSnapshot:
@@ -64,6 +80,14 @@ class UserContext:
     conversation_summary: Optional[str] = None
     goals: Optional[str] = None
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserContext":
+        """Build a context from plain request data (e.g. a model_dump), nesting the health fields."""
+        health = data.get("health")
+        if health is not None:
+            data = {**data, "health": HealthSnapshot(**health)}
+        return cls(**data)
+
 def build_wellness_context(ctx: UserContext) -> str:
     """
     Build a short text summary of the user's state for the wellness agent.
@@ -101,6 +125,11 @@ FORMAT = pyaudio.paInt16
 CHANNELS = 1
 ECHO_DELAY = 0.3
 FINAL_AUDIO_WAIT = 2.0  # Give 2 seconds for final audio to play
+INPUT_RING_CHUNKS = 64  # Mic chunks buffered (~2 s) before the oldest are dropped
+INPUT_BATCH_CHUNKS = 4  # Mic chunks (~128 ms) sent per realtime input frame
+INPUT_BATCH_BYTES = INPUT_BATCH_CHUNKS * CHUNK_SIZE * CHANNELS * 2  # 16-bit samples
+INPUT_MIME_TYPE = f"audio/pcm;rate={INPUT_SAMPLE_RATE}"
+OUTPUT_WRITE_MIN_BYTES = 4096  # Model audio (~85 ms) gathered per speaker write
 
 
 class AudioHandler:
@@ -108,13 +137,21 @@ class AudioHandler:
         self.p = pyaudio.PyAudio()
         self.input_stream = None
         self.output_stream = None
+        # Filled by PortAudio's callback thread, drained by read_input_chunks()
+        self._input_ring = collections.deque(maxlen=INPUT_RING_CHUNKS)
+        self._input_ready: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     def start_input_stream(self):
+        """Open the mic in callback mode. Must be called from the event loop thread."""
         if self.input_stream:
             return
+        self._loop = asyncio.get_running_loop()
+        self._input_ready = asyncio.Event()
         self.input_stream = self.p.open(
             format=FORMAT, channels=CHANNELS, rate=INPUT_SAMPLE_RATE,
-            input=True, frames_per_buffer=CHUNK_SIZE
+            input=True, frames_per_buffer=CHUNK_SIZE,
+            stream_callback=self._on_input
         )
 
     def start_output_stream(self):
@@ -125,10 +162,24 @@ class AudioHandler:
             output=True, frames_per_buffer=CHUNK_SIZE
         )
 
-    def read_input(self):
-        if self.input_stream and self.input_stream.is_active():
-            return self.input_stream.read(CHUNK_SIZE, exception_on_overflow=False)
-        return None
+    def _on_input(self, in_data, frame_count, time_info, status):
+        """PortAudio callback: queue the chunk and wake the event loop, nothing more."""
+        self._input_ring.append(in_data)
+        try:
+            self._loop.call_soon_threadsafe(self._input_ready.set)
+        except RuntimeError:
+            # Event loop already closed; the session is over
+            return None, pyaudio.paComplete
+        return None, pyaudio.paContinue
+
+    async def read_input_chunks(self) -> List[bytes]:
+        """Wait for mic audio and return every chunk captured since the last call."""
+        await self._input_ready.wait()
+        self._input_ready.clear()
+        chunks = []
+        while self._input_ring:
+            chunks.append(self._input_ring.popleft())
+        return chunks
 
     def write_output(self, audio_data):
         if self.output_stream and self.output_stream.is_active():
@@ -160,16 +211,24 @@ async def audio_input_loop(session, audio_handler, state):
     """Sends audio ONLY when the AI is NOT speaking."""
     print(f"--- 🎤 Listening ({INPUT_SAMPLE_RATE}Hz)... ---")
     try:
+        batch = bytearray()
         while not state.should_end_session:
-            audio_data = await asyncio.to_thread(audio_handler.read_input)
-            if audio_data and not state.is_ai_speaking and not state.end_session_requested:
+            chunks = await audio_handler.read_input_chunks()
+            if state.is_ai_speaking or state.end_session_requested:
+                # Mic audio is discarded while the AI talks, including a partial batch
+                batch.clear()
+                continue
+
+            for audio_data in chunks:
+                batch += audio_data
+            if len(batch) >= INPUT_BATCH_BYTES:
                 await session.send_realtime_input(
                     audio=types.Blob(
-                        data=audio_data,
-                        mime_type=f"audio/pcm;rate={INPUT_SAMPLE_RATE}"
+                        data=bytes(batch),
+                        mime_type=INPUT_MIME_TYPE
                     )
                 )
-            await asyncio.sleep(0.00)
+                batch.clear()
     except asyncio.CancelledError:
         pass
     except Exception as e:
@@ -180,6 +239,10 @@ async def audio_output_loop(session, audio_handler, state):
     """Handles audio output, transcription, and turn management with live agent coordination."""
     print(f"--- 🔊 Ready for Audio ({OUTPUT_SAMPLE_RATE}Hz) ---")
 
+    # Model audio waiting to be played; written out in larger blocks so each
+    # worker-thread hop plays more than one small part
+    out_buf = bytearray()
+
     try:
         while not state.should_end_session:
             try:
@@ -224,14 +287,18 @@ async def audio_output_loop(session, audio_handler, state):
                             current_text_parts = []
 
                             for part in server_content.model_turn.parts:
-                                # Play audio
+                                # Queue audio for playback
                                 if part.inline_data:
-                                    await asyncio.to_thread(audio_handler.write_output, part.inline_data.data)
+                                    out_buf += part.inline_data.data
 
                                 # Collect text for transcription
                                 if hasattr(part, 'text') and part.text:
                                     current_text_parts.append(part.text)
 
+                            if len(out_buf) >= OUTPUT_WRITE_MIN_BYTES:
+                                await asyncio.to_thread(audio_handler.write_output, bytes(out_buf))
+                                out_buf.clear()
+
                             # Store agent's text and send to coordinator
                             if current_text_parts:
                                 state.last_agent_text = " ".join(current_text_parts)
@@ -241,6 +308,9 @@ async def audio_output_loop(session, audio_handler, state):
 
                         # Handle turn completion
                         if server_content.turn_complete:
+                            if out_buf:
+                                await asyncio.to_thread(audio_handler.write_output, bytes(out_buf))
+                                out_buf.clear()
                             await asyncio.sleep(ECHO_DELAY)
                             state.is_ai_speaking = False
                             print(".", end="", flush=True)
@@ -321,11 +391,13 @@ class WellnessAgentLive:
             self,
             user_context: UserContext,
             initial_history: Optional[List] = None,
-            on_session_end=None
+            on_session_end=None,
+            on_event=None
     ):
         """
         Start voice session with live agent coordination.
         Agents continuously analyze the conversation and provide real-time insights.
+        If given, on_event(dict) is awaited with each live analysis result.
         """
         audio_handler = AudioHandler()
 
@@ -346,6 +418,8 @@ class WellnessAgentLive:
             print(f"   Urgency: {analysis.urgency_level}")
             if analysis.social_suggestions:
                 print(f"   Top Suggestion: {analysis.social_suggestions[0][:60]}...")
+            if on_event:
+                await on_event({"event": "live_analysis", **asdict(analysis)})
 
         async def _run():
             # Extract context from history
@@ -362,13 +436,7 @@ class WellnessAgentLive:
 
             config = types.LiveConnectConfig(
                 response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name="Zephyr"
-                        )
-                    )
-                ),
+                speech_config=_VOICE_SPEECH_CONFIG,
                 system_instruction=system_prompt,
                 tools=[end_session_tool],
             )
@@ -472,8 +540,6 @@ class WellnessAgentLive:
         finally:
             audio_handler.close()
 
-    from typing import Dict  # add to your imports at the top: Optional, List, Dict
-
     async def chat(
         self,
         user_message: str,
@@ -487,14 +553,9 @@ class WellnessAgentLive:
         `history` is a list of dicts:
           [{ "role": "user"|"assistant", "text": "..." }, ...]
         """
-        config = types.LiveConnectConfig(
-            response_modalities=["TEXT"],
-            system_instruction=WELLNESS_SYSTEM_PROMPT,
-        )
-
         async with self.client.aio.live.connect(
             model=self.model_id,
-            config=config,
+            config=_CHAT_CONFIG,
         ) as session:
             # 0) Re-send conversation history (only user turns)
             if history:
@@ -581,7 +642,15 @@ async def main():
 
 
 if __name__ == "__main__":
-    if sys.platform == 'win32':
+    # uvloop is optional (and unavailable on Windows); fall back to asyncio
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    elif sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
     try: